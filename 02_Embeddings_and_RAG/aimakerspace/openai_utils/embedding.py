@@ -3,11 +3,74 @@ from openai import AsyncOpenAI, OpenAI
 import openai
 from typing import List
 import os
+import random
 import asyncio
 
 
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-leaning token estimate (~3 characters per token for English)."""
+    return len(text) // 3 + 1
+
+
+def pack_batches(
+    list_of_text: List[str], max_batch_tokens: int, max_batch_size: int
+) -> List[List[str]]:
+    """
+    Greedily packs texts, in order, into batches under both a token and an item budget.
+
+    A single text larger than `max_batch_tokens` still gets a batch of its own.
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for text in list_of_text:
+        tokens = estimate_tokens(text)
+        if batch and (batch_tokens + tokens > max_batch_tokens or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and transport failures are worth retrying."""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def backoff_delay(attempt: int, error: Exception, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff, honouring a server Retry-After header."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        floor = float(retry_after) if retry_after else 0.0
+    except ValueError:
+        floor = 0.0
+    return max(floor, random.uniform(0, min(cap, base * 2**attempt)))
+
+
 class EmbeddingModel:
-    def __init__(self, embeddings_model_name: str = "text-embedding-3-small"):
+    def __init__(
+        self,
+        embeddings_model_name: str = "text-embedding-3-small",
+        max_concurrency: int = 8,
+        max_batch_tokens: int = 250_000,
+        max_batch_size: int = 2048,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        """
+        :param embeddings_model_name: OpenAI embedding model to call
+        :param max_concurrency: Maximum number of embedding requests in flight
+        :param max_batch_tokens: Estimated token budget per request
+        :param max_batch_size: Maximum number of inputs per request
+        :param max_retries: Retries for 429/5xx/connection errors before giving up
+        :param backoff_base: Initial retry delay in seconds, doubled per attempt
+        :param backoff_max: Cap on a single retry delay in seconds
+        """
         load_dotenv()
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.async_client = AsyncOpenAI()
@@ -19,20 +82,33 @@ class EmbeddingModel:
             )
         openai.api_key = self.openai_api_key
         self.embeddings_model_name = embeddings_model_name
+        self.max_concurrency = max_concurrency
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
 
     async def async_get_embeddings(self, list_of_text: List[str]) -> List[List[float]]:
-        batch_size = 1024
-        batches = [list_of_text[i:i + batch_size] for i in range(0, len(list_of_text), batch_size)]
-        
+        batches = pack_batches(list_of_text, self.max_batch_tokens, self.max_batch_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
         async def process_batch(batch):
-            embedding_response = await self.async_client.embeddings.create(
-                input=batch, model=self.embeddings_model_name
-            )
-            return [embeddings.embedding for embeddings in embedding_response.data]
-        
-        # Use asyncio.gather to process all batches concurrently
+            async with semaphore:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        embedding_response = await self.async_client.embeddings.create(
+                            input=batch, model=self.embeddings_model_name
+                        )
+                        return [embeddings.embedding for embeddings in embedding_response.data]
+                    except Exception as e:
+                        if attempt == self.max_retries or not _is_retryable(e):
+                            raise
+                        await asyncio.sleep(backoff_delay(attempt, e, self.backoff_base, self.backoff_max))
+
+        # Use asyncio.gather to process batches concurrently; it preserves batch order
         results = await asyncio.gather(*[process_batch(batch) for batch in batches])
-        
+
         # Flatten the results
         return [embedding for batch_result in results for embedding in batch_result]
 
@@ -1,5 +1,6 @@
 import re
-from typing import Dict, List, Any, Optional, Union, Callable
+from string import Formatter
+from typing import Dict, Iterable, Iterator, List, Any, Mapping, Optional, Sequence, Tuple, Union, Callable
 from abc import ABC, abstractmethod
 
 
@@ -8,6 +9,30 @@ class PromptValidationError(Exception):
     pass
 
 
+BatchInputs = Union[Iterable[Dict[str, Any]], Mapping[str, Sequence[Any]]]
+
+
+def iter_rows(inputs: BatchInputs) -> Iterator[Dict[str, Any]]:
+    """
+    Yields one kwargs dict per row from row-oriented or column-oriented inputs.
+
+    :param inputs: Either an iterable of kwargs dicts, or a mapping of variable
+        name to an equally long sequence of values (e.g. a DataFrame's columns)
+    :raises ValueError: If columns have different lengths
+    """
+    if not isinstance(inputs, Mapping):
+        yield from inputs
+        return
+
+    names = list(inputs)
+    columns = [inputs[name] for name in names]
+    lengths = {len(column) for column in columns}
+    if len(lengths) > 1:
+        raise ValueError(f"All columns must have the same length, got {sorted(lengths)}")
+    for values in zip(*columns):
+        yield dict(zip(names, values))
+
+
 class ConditionalPrompt:
     """Enhanced prompt with conditional logic support"""
     
@@ -24,56 +49,87 @@ class ConditionalPrompt:
         :param strict: If True, raises error when required variables are missing
         :param defaults: Default values for template variables
         """
+        self._var_pattern = re.compile(r'\{([^{}]+)\}')
+        self._conditional_pattern = re.compile(r'\{if\s+([^}]+)\}(.*?)(?:\{else\}(.*?))?\{/if\}', re.DOTALL)
         self.prompt = prompt
         self.strict = strict
         self.defaults = defaults or {}
-        self._var_pattern = re.compile(r'\{([^{}]+)\}')
-        self._conditional_pattern = re.compile(r'\{if\s+([^}]+)\}(.*?)(?:\{else\}(.*?))?\{/if\}', re.DOTALL)
-        
+
+    @property
+    def prompt(self) -> str:
+        return self._prompt
+
+    @prompt.setter
+    def prompt(self, prompt: str) -> None:
+        """Setting the template (re)compiles it, so rendering never re-parses it"""
+        self._prompt = prompt
+        self._nodes = self._compile(prompt)
+
+    def _split_variables(self, text: str) -> List[Tuple[str, Optional[str]]]:
+        """Splits text into (literal, variable name or None) segments"""
+        segments = []
+        position = 0
+        for match in self._var_pattern.finditer(text):
+            segments.append((text[position:match.start()], match.group(1)))
+            position = match.end()
+        segments.append((text[position:], None))
+        return segments
+
+    def _compile(self, prompt: str) -> List[Any]:
+        """
+        Compiles the template into a node list: variable segment lists for plain
+        text and (condition, true segments, false segments) tuples for {if} blocks.
+        """
+        nodes = []
+        position = 0
+        for match in self._conditional_pattern.finditer(prompt):
+            nodes.append(self._split_variables(prompt[position:match.start()]))
+            nodes.append((
+                match.group(1).strip(),
+                self._split_variables(match.group(2).strip()),
+                self._split_variables(match.group(3).strip() if match.group(3) else ""),
+            ))
+            position = match.end()
+        nodes.append(self._split_variables(prompt[position:]))
+        return nodes
+
     def format_prompt(self, **kwargs) -> str:
         """Format prompt with conditional logic evaluation"""
         merged_kwargs = {**self.defaults, **kwargs}
-        
-        # Process conditional statements
-        result = self._process_conditionals(self.prompt, merged_kwargs)
-        
-        # Process regular variables
-        variables = self._var_pattern.findall(result)
-        
+
+        # Pick a branch for each conditional block
+        segments = []
+        for node in self._nodes:
+            if isinstance(node, tuple):
+                condition, true_segments, false_segments = node
+                node = true_segments if self._condition_holds(condition, merged_kwargs) else false_segments
+            segments.extend(node)
+
         if self.strict:
-            missing_vars = set(variables) - set(merged_kwargs.keys())
+            variables = {var for _, var in segments if var is not None}
+            missing_vars = variables - set(merged_kwargs.keys())
             if missing_vars:
                 raise PromptValidationError(f"Missing required variables: {missing_vars}")
-        
-        # Format remaining variables
-        for var in variables:
-            value = merged_kwargs.get(var, "")
-            result = result.replace(f"{{{var}}}", str(value))
-            
-        return result
-    
-    def _process_conditionals(self, text: str, context: Dict[str, Any]) -> str:
-        """Process conditional statements in the text"""
-        def replace_conditional(match):
-            condition = match.group(1).strip()
-            true_content = match.group(2).strip()
-            false_content = match.group(3).strip() if match.group(3) else ""
-            
-            # Evaluate condition
-            try:
-                # Simple evaluation - check if variable exists and is truthy
-                if condition in context:
-                    condition_result = bool(context[condition])
-                else:
-                    # Try to evaluate as a simple expression
-                    condition_result = self._evaluate_condition(condition, context)
-                
-                return true_content if condition_result else false_content
-            except Exception:
-                return false_content
-        
-        return self._conditional_pattern.sub(replace_conditional, text)
-    
+
+        # Render every segment in a single pass
+        parts = []
+        for literal, var in segments:
+            parts.append(literal)
+            if var is not None:
+                parts.append(str(merged_kwargs.get(var, "")))
+        return "".join(parts)
+
+    def _condition_holds(self, condition: str, context: Dict[str, Any]) -> bool:
+        """Evaluate a conditional block's condition; errors count as false"""
+        try:
+            # Simple evaluation - check if variable exists and is truthy
+            if condition in context:
+                return bool(context[condition])
+            # Try to evaluate as a simple expression
+            return self._evaluate_condition(condition, context)
+        except Exception:
+            return False
+
     def _evaluate_condition(self, condition: str, context: Dict[str, Any]) -> bool:
         """Evaluate simple conditions like 'var > 5' or 'var == "value"'"""
         # Simple equality check
@@ -115,12 +171,23 @@ class BasePrompt:
         :param strict: If True, raises error when required variables are missing
         :param defaults: Default values for template variables
         """
+        self._pattern = re.compile(r"\{([^}]+)\}")
         self.prompt = prompt
         self.strict = strict
         self.defaults = defaults or {}
-        self._pattern = re.compile(r"\{([^}]+)\}")
         self._validate_template()
 
+    @property
+    def prompt(self) -> str:
+        return self._prompt
+
+    @prompt.setter
+    def prompt(self, prompt: str) -> None:
+        """Setting the template (re)compiles it, so rendering never re-parses it"""
+        self._prompt = prompt
+        self._variables = self._pattern.findall(prompt)
+        self._segments = list(Formatter().parse(prompt))
+
     def _validate_template(self) -> None:
         """Validates the template syntax"""
         try:
@@ -137,29 +204,55 @@ class BasePrompt:
         :return: The formatted prompt string
         :raises PromptValidationError: If strict mode and required variables are missing
         """
-        variables = self.get_input_variables()
         merged_kwargs = {**self.defaults, **kwargs}
         
         if self.strict:
-            missing_vars = set(variables) - set(merged_kwargs.keys())
+            missing_vars = set(self._variables) - set(merged_kwargs.keys())
             if missing_vars:
                 raise PromptValidationError(f"Missing required variables: {missing_vars}")
         
-        # Use defaults for missing variables
-        format_dict = {var: merged_kwargs.get(var, self.defaults.get(var, "")) for var in variables}
-        
         try:
-            return self.prompt.format(**format_dict)
+            return self._render(merged_kwargs)
         except (KeyError, ValueError) as e:
             raise PromptValidationError(f"Error formatting prompt: {e}")
 
+    def format_many(
+        self, inputs: BatchInputs, lazy: bool = False, **shared
+    ) -> Union[List[str], Iterator[str]]:
+        """
+        Formats the prompt once per input row, reusing the parsed template.
+
+        :param inputs: Rows as kwargs dicts, or a mapping of column name to values
+        :param lazy: Return a generator instead of a list
+        :param shared: Values used for every row (row values take precedence)
+        :return: The formatted prompt strings, in input order
+        """
+        rendered = (self.format_prompt(**{**shared, **row}) for row in iter_rows(inputs))
+        return rendered if lazy else list(rendered)
+
+    def _render(self, values: Dict[str, Any]) -> str:
+        """Renders the pre-parsed segments with a single join; missing variables become ''"""
+        parts = []
+        for literal, field, spec, conversion in self._segments:
+            parts.append(literal)
+            if field is not None:
+                value = values.get(field, "")
+                if conversion == "r":
+                    value = repr(value)
+                elif conversion == "s":
+                    value = str(value)
+                elif conversion == "a":
+                    value = ascii(value)
+                parts.append(format(value, spec))
+        return "".join(parts)
+
     def get_input_variables(self) -> List[str]:
         """
         Gets the list of input variable names from the prompt string.
 
         :return: List of input variable names
         """
-        return self._pattern.findall(self.prompt)
+        return list(self._variables)
     
     def validate_inputs(self, **kwargs) -> Dict[str, List[str]]:
         """
@@ -209,6 +302,23 @@ class RolePrompt(BasePrompt):
         
         return {"role": self.role, "content": self.prompt}
 
+    def create_messages(
+        self, inputs: BatchInputs, lazy: bool = False, **shared
+    ) -> Union[List[Dict[str, str]], Iterator[Dict[str, str]]]:
+        """
+        Creates one message dictionary per input row, e.g. for a batched chat call.
+
+        :param inputs: Rows as kwargs dicts, or a mapping of column name to values
+        :param lazy: Return a generator instead of a list
+        :param shared: Values used for every row (row values take precedence)
+        :return: Message dictionaries, in input order
+        """
+        messages = (
+            {"role": self.role, "content": content}
+            for content in self.format_many(inputs, lazy=True, **shared)
+        )
+        return messages if lazy else list(messages)
+
 
 class SystemRolePrompt(RolePrompt):
     def __init__(self, prompt: str, strict: bool = False, defaults: Optional[Dict[str, Any]] = None):
@@ -352,6 +462,10 @@ if __name__ == "__main__":
     # Role prompts
     system = SystemRolePrompt("You are a helpful assistant", defaults={"tone": "friendly"})
     print(system.create_message())
+
+    # Batch rendering (row- or column-oriented inputs)
+    user = UserRolePrompt("Summarize {topic} for a {audience}")
+    print(user.create_messages({"topic": ["RAG", "embeddings"]}, audience="beginner"))
     
     # Conditional prompts
     conditional = ConditionalPrompt(
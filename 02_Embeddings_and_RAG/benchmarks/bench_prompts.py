@@ -0,0 +1,80 @@
+"""Per-render cost of the compiled prompt templates at growing context sizes.
+
+Run from the 02_Embeddings_and_RAG directory:
+
+    python -m benchmarks.bench_prompts
+
+For comparison, "legacy" re-implements the previous rendering: a regex scan of
+the template on every call, and for ConditionalPrompt a regex substitution of
+the {if} blocks followed by one str.replace pass over the result per variable.
+"""
+import re
+import timeit
+
+from aimakerspace.openai_utils.prompts import BasePrompt, ConditionalPrompt
+
+
+RAG_TEMPLATE = """Use the provided context to answer the user's query.
+{if strict_mode}Only answer from the context; otherwise say "I don't know".{else}Be helpful.{/if}
+
+Context:
+{context}
+
+Sources: {sources}
+Question: {question}
+Answer in {language}, for a {audience} audience."""
+
+_VAR = re.compile(r"\{([^{}]+)\}")
+_BASE_VAR = re.compile(r"\{([^}]+)\}")
+_CONDITIONAL = re.compile(r"\{if\s+([^}]+)\}(.*?)(?:\{else\}(.*?))?\{/if\}", re.DOTALL)
+
+
+def legacy_base(template: str, **kwargs) -> str:
+    variables = _BASE_VAR.findall(template)
+    return template.format(**{var: kwargs.get(var, "") for var in variables})
+
+
+def legacy_conditional(template: str, **kwargs) -> str:
+    def replace_conditional(match):
+        condition = match.group(1).strip()
+        return match.group(2).strip() if kwargs.get(condition) else (match.group(3) or "").strip()
+
+    result = _CONDITIONAL.sub(replace_conditional, template)
+    for var in _VAR.findall(result):
+        result = result.replace(f"{{{var}}}", str(kwargs.get(var, "")))
+    return result
+
+
+def per_render_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    base_template = re.sub(r"\{if.*?\{/if\}", "", RAG_TEMPLATE, flags=re.DOTALL)
+    base = BasePrompt(base_template)
+    conditional = ConditionalPrompt(RAG_TEMPLATE)
+
+    print(f"{'context':>9} {'Base legacy':>12} {'Base':>10} {'Cond legacy':>12} {'Cond':>10}   (us/render)")
+    for size in (1_000, 10_000, 100_000):
+        kwargs = {
+            "context": ("lorem ipsum dolor sit amet " * (size // 27 + 1))[:size],
+            "sources": "a.pdf, b.pdf",
+            "question": "What is the deadline?",
+            "language": "English",
+            "audience": "student",
+            "strict_mode": True,
+        }
+        number = max(10, 2_000_000 // size)
+        assert base.format_prompt(**kwargs) == legacy_base(base_template, **kwargs)
+        assert conditional.format_prompt(**kwargs) == legacy_conditional(RAG_TEMPLATE, **kwargs)
+        print(
+            f"{size:>9,} "
+            f"{per_render_us(lambda: legacy_base(base_template, **kwargs), number):>12.2f} "
+            f"{per_render_us(lambda: base.format_prompt(**kwargs), number):>10.2f} "
+            f"{per_render_us(lambda: legacy_conditional(RAG_TEMPLATE, **kwargs), number):>12.2f} "
+            f"{per_render_us(lambda: conditional.format_prompt(**kwargs), number):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import json
+import os
+import numpy as np
+from typing import List, Optional, Tuple
+
+from aimakerspace.fileio import save_array, save_json
+
+
+# Upper bound on the (rows x centroids) score block materialized at once.
+MAX_ASSIGN_BLOCK = 2**24
+
+
+def _assign(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Returns the index of the most similar centroid for every row."""
+    block = max(1, MAX_ASSIGN_BLOCK // len(centroids))
+    assignments = np.empty(len(rows), dtype=np.int64)
+    for start in range(0, len(rows), block):
+        scores = rows[start : start + block] @ centroids.T
+        assignments[start : start + block] = np.argmax(scores, axis=1)
+    return assignments
+
+
+def spherical_kmeans(
+    rows: np.ndarray, n_clusters: int, n_iter: int = 20, seed: int = 0
+) -> np.ndarray:
+    """
+    Clusters unit-length rows by cosine similarity.
+
+    :param rows: (n, dim) matrix of unit-length rows
+    :param n_clusters: Number of centroids to learn
+    :param n_iter: Number of Lloyd iterations
+    :param seed: Seed for centroid initialization and empty-cluster reseeding
+    :return: (n_clusters, dim) matrix of unit-length centroids
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(rows))
+    centroids = rows[rng.choice(len(rows), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = _assign(rows, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        order = np.argsort(assignments, kind="stable")
+        sums = np.zeros_like(centroids)
+        filled = np.flatnonzero(counts)
+        sums[filled] = np.add.reduceat(rows[order], np.cumsum(counts)[filled] - counts[filled])
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = rows[rng.choice(len(rows), len(empty), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1.0, norms)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        n_iter: int = 10,
+        max_train_rows: int = 64,
+        seed: int = 0,
+    ):
+        """
+        Inverted-file index over unit-length rows with a k-means coarse quantizer.
+
+        Every row is filed under its nearest centroid; a query only scores the
+        rows filed under its `n_probe` nearest centroids. Raising `n_probe`
+        trades latency for recall, up to exact search at `n_probe == n_lists`.
+
+        :param n_lists: Number of centroids (defaults to sqrt of the row count)
+        :param n_probe: Number of lists scanned per query
+        :param n_iter: k-means iterations used when building
+        :param max_train_rows: k-means trains on at most this many rows per list
+        :param seed: Random seed for training
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.max_train_rows = max_train_rows
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+
+    def build(self, matrix: np.ndarray) -> "IVFIndex":
+        """Trains the coarse quantizer on `matrix` and files every row."""
+        if len(matrix) == 0:
+            raise ValueError("Cannot build an index over an empty matrix")
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(matrix))))
+        n_lists = min(n_lists, len(matrix))
+
+        rng = np.random.default_rng(self.seed)
+        n_train = min(len(matrix), n_lists * self.max_train_rows)
+        train = matrix[np.sort(rng.choice(len(matrix), n_train, replace=False))]
+        self.centroids = spherical_kmeans(train, n_lists, self.n_iter, self.seed)
+        self.n_lists = len(self.centroids)
+
+        self.lists = [np.empty(0, dtype=np.int64) for _ in range(self.n_lists)]
+        self.add(np.arange(len(matrix)), matrix)
+        return self
+
+    def add(self, row_ids: np.ndarray, rows: np.ndarray) -> None:
+        """Files already-normalized `rows` (with ids `row_ids`) under their nearest list."""
+        if self.centroids is None:
+            raise ValueError("Index has not been built")
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        assignments = _assign(rows, self.centroids)
+        order = np.argsort(assignments, kind="stable")
+        lists, starts = np.unique(assignments[order], return_index=True)
+        for list_id, ids in zip(lists, np.split(row_ids[order], starts[1:])):
+            self.lists[list_id] = np.concatenate([self.lists[list_id], ids])
+
+    def remap(self, new_row_ids: np.ndarray) -> None:
+        """
+        Renumbers the filed rows after rows were removed from the matrix.
+
+        :param new_row_ids: New id for every old row id, or -1 for removed rows
+        """
+        for list_id, ids in enumerate(self.lists):
+            mapped = new_row_ids[ids]
+            self.lists[list_id] = mapped[mapped >= 0]
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        n_probe: Optional[int] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k cosine search.
+
+        :param matrix: The unit-length rows the index was built over
+        :param query: Unit-length query vector
+        :param k: Number of results to return
+        :param n_probe: Overrides `self.n_probe` for this query
+        :param mask: Boolean row mask; rows where it is False are not scored
+        :return: (row ids, scores), best first
+        """
+        if self.centroids is None:
+            raise ValueError("Index has not been built")
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        candidates = np.concatenate([self.lists[list_id] for list_id in probes])
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        if len(candidates) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = matrix[candidates] @ query
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(k)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return candidates[top], scores[top]
+
+    def save(self, path: str) -> None:
+        """Writes the centroids and inverted lists (as flat ids plus offsets) to `path`."""
+        if self.centroids is None:
+            raise ValueError("Index has not been built")
+        os.makedirs(path, exist_ok=True)
+        offsets = np.cumsum([0] + [len(ids) for ids in self.lists])
+        save_array(os.path.join(path, "centroids.npy"), self.centroids)
+        save_array(os.path.join(path, "list_ids.npy"), np.concatenate(self.lists))
+        save_array(os.path.join(path, "list_offsets.npy"), offsets)
+        save_json(
+            os.path.join(path, "index.json"),
+            {"n_probe": self.n_probe, "n_iter": self.n_iter,
+             "max_train_rows": self.max_train_rows, "seed": self.seed},
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "IVFIndex":
+        """Reads an index written by `save`; each list is a view into the flat id array."""
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, "index.json")) as f:
+            index = cls(**json.load(f))
+        index.centroids = np.load(os.path.join(path, "centroids.npy"))
+        list_ids = np.load(os.path.join(path, "list_ids.npy"), mmap_mode=mmap_mode)
+        offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        index.n_lists = len(index.centroids)
+        index.lists = [list_ids[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+        return index
@@ -0,0 +1,190 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aimakerspace.fileio import save_array, save_json
+
+
+_WORD = re.compile(r"\w+")
+# Identifiers joined by - . / such as "1098-e" or "685.200".
+_COMPOUND = re.compile(r"\b\w+(?:[-./]\w+)+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased word tokens. Compound identifiers are kept whole and also
+    split into their parts, so "Form 1098-E" matches both "1098-e" and "1098".
+    """
+    text = text.lower()
+    return _WORD.findall(text) + _COMPOUND.findall(text)
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        In-process inverted index with Okapi BM25 scoring over integer doc ids.
+
+        Postings are kept in CSR form: one flat int32 array of doc ids and one
+        uint16 array of term frequencies, grouped by term and addressed by an
+        offsets array. New documents are buffered and merged in bulk on the
+        next search, so batched adds stay cheap.
+
+        :param k1: Term-frequency saturation
+        :param b: Document-length normalization strength
+        """
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.term_freqs = np.empty(0, dtype=np.uint16)
+        self.doc_lengths = np.empty(0, dtype=np.float32)
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_ids: List[int], texts: List[str]) -> None:
+        """
+        Indexes `texts` under `doc_ids`. Ids past the end grow the index (gaps
+        become empty documents); existing ids have their postings replaced.
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(doc_ids) == 0:
+            return
+        replaced = doc_ids[doc_ids < len(self.doc_lengths)]
+        if len(replaced):
+            self._drop_postings(replaced)
+
+        vocabulary = self.vocabulary
+        lengths, n_terms, terms, freqs = [], [], [], []
+        for text in texts:
+            tokens = tokenize(text)
+            counts = Counter(tokens)
+            lengths.append(len(tokens))
+            n_terms.append(len(counts))
+            terms.extend([vocabulary.setdefault(term, len(vocabulary)) for term in counts])
+            freqs.extend(counts.values())
+        self._pending.append((
+            np.asarray(terms, dtype=np.int64),
+            np.repeat(doc_ids, n_terms).astype(np.int32),
+            np.minimum(np.asarray(freqs, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16),
+        ))
+
+        n_docs = max(len(self.doc_lengths), int(doc_ids.max()) + 1)
+        if n_docs > len(self.doc_lengths):
+            self.doc_lengths = np.concatenate(
+                [self.doc_lengths, np.zeros(n_docs - len(self.doc_lengths), dtype=np.float32)]
+            )
+        elif not self.doc_lengths.flags.writeable:
+            self.doc_lengths = self.doc_lengths.copy()
+        self.doc_lengths[doc_ids] = lengths
+
+    def _term_column(self) -> np.ndarray:
+        """Term id of every compacted posting."""
+        return np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+
+    def _set_postings(self, terms: np.ndarray, docs: np.ndarray, freqs: np.ndarray) -> None:
+        order = np.lexsort((docs, terms))
+        self.doc_ids = docs[order].astype(np.int32)
+        self.term_freqs = freqs[order].astype(np.uint16)
+        counts = np.bincount(terms, minlength=len(self.vocabulary))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def _compact(self) -> None:
+        """Merges buffered postings into the CSR arrays."""
+        if not self._pending and len(self.offsets) - 1 == len(self.vocabulary):
+            return
+        parts = [(self._term_column(), self.doc_ids, self.term_freqs)] + self._pending
+        self._set_postings(*(np.concatenate(column) for column in zip(*parts)))
+        self._pending = []
+
+    def _drop_postings(self, doc_ids: np.ndarray) -> None:
+        self._compact()
+        keep = ~np.isin(self.doc_ids, doc_ids)
+        self._set_postings(self._term_column()[keep], self.doc_ids[keep], self.term_freqs[keep])
+
+    def remap(self, new_doc_ids: np.ndarray) -> None:
+        """
+        Renumbers documents after some were removed.
+
+        :param new_doc_ids: New id for every old doc id, or -1 for removed docs
+        """
+        self._compact()
+        new_doc_ids = np.asarray(new_doc_ids)
+        mapped = new_doc_ids[self.doc_ids]
+        keep = mapped >= 0
+        self._set_postings(self._term_column()[keep], mapped[keep], self.term_freqs[keep])
+        self.doc_lengths = self.doc_lengths[new_doc_ids[: len(self.doc_lengths)] >= 0]
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores only the documents containing at least one query term (and,
+        with a boolean `mask`, only those where the mask is True).
+
+        :return: (doc ids, scores), best first; documents scoring 0 are omitted
+        """
+        self._compact()
+        term_ids = sorted({self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary})
+        n_docs = len(self.doc_lengths)
+        if not term_ids or k <= 0 or n_docs == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.doc_lengths.mean(), 1e-9))
+        scores = np.zeros(n_docs, dtype=np.float32)
+        touched = []
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            freqs = self.term_freqs[start:end].astype(np.float32)
+            df = end - start
+            if mask is not None:
+                # Filtered-out postings are skipped, but idf keeps the global df
+                allowed = mask[docs]
+                docs, freqs = docs[allowed], freqs[allowed]
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            # Doc ids are unique within a posting list, so fancy-index += is safe
+            scores[docs] += idf * freqs * (self.k1 + 1) / (freqs + length_norm[docs])
+            touched.append(docs)
+
+        candidates = np.unique(np.concatenate(touched)).astype(np.int64)
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        candidate_scores = scores[candidates]
+        k = min(k, len(candidates))
+        top = np.argpartition(-candidate_scores, k - 1)[:k] if k < len(candidates) else np.arange(k)
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        return candidates[top], candidate_scores[top]
+
+    def save(self, path: str) -> None:
+        """Writes the vocabulary and the CSR postings arrays to `path`."""
+        self._compact()
+        os.makedirs(path, exist_ok=True)
+        save_array(os.path.join(path, "offsets.npy"), self.offsets)
+        save_array(os.path.join(path, "doc_ids.npy"), self.doc_ids)
+        save_array(os.path.join(path, "term_freqs.npy"), self.term_freqs)
+        save_array(os.path.join(path, "doc_lengths.npy"), self.doc_lengths)
+        save_json(
+            os.path.join(path, "index.json"),
+            {"k1": self.k1, "b": self.b, "terms": sorted(self.vocabulary, key=self.vocabulary.get)},
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "BM25Index":
+        """Reads an index written by `save`; the postings arrays can be memory-mapped."""
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index.vocabulary = {term: term_id for term_id, term in enumerate(meta["terms"])}
+        index.offsets = np.load(os.path.join(path, "offsets.npy"))
+        index.doc_ids = np.load(os.path.join(path, "doc_ids.npy"), mmap_mode=mmap_mode)
+        index.term_freqs = np.load(os.path.join(path, "term_freqs.npy"), mmap_mode=mmap_mode)
+        index.doc_lengths = np.load(os.path.join(path, "doc_lengths.npy"))
+        return index
@@ -0,0 +1,31 @@
+import json
+import os
+from typing import Any
+
+import numpy as np
+
+
+def _tmp_path(path: str) -> str:
+    return f"{path}.{os.getpid()}.tmp"
+
+
+def save_array(path: str, array: np.ndarray) -> None:
+    """
+    Writes `array` as a `.npy` file at `path` via a temp file and a rename.
+
+    The rename never touches the old file's contents, so it is safe even while
+    `path` is memory-mapped (e.g. saving a database back to where it was
+    loaded from), and a crash leaves either the old or the new file.
+    """
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def save_json(path: str, obj: Any, **dump_kwargs) -> None:
+    """Writes `obj` as JSON at `path` via a temp file and a rename."""
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, **dump_kwargs)
+    os.replace(tmp_path, path)
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from aimakerspace.text_utils import CharacterTextSplitter, PDFLoader, TextFileLoader, TokenTextSplitter
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+MANIFEST_VERSION = 2
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_hash(chunk: str) -> str:
+    """Short content hash the manifest records in place of a chunk's text."""
+    return hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def splitter_config(splitter: CharacterTextSplitter) -> list:
+    """Everything about `splitter` that changes the chunks it produces."""
+    config = [type(splitter).__name__, splitter.chunk_size, splitter.chunk_overlap]
+    if isinstance(splitter, TokenTextSplitter):
+        encoding_name = splitter._encoding.name if splitter._encoding is not None else splitter.encoding_name
+        config += [encoding_name, splitter.min_chunk_fraction]
+    return config
+
+
+class FileManifest:
+    def __init__(self, path: str):
+        """
+        Records what has been ingested: per file its size, mtime, content hash
+        and the hashes of the chunks it contributed to the vector database.
+
+        :param path: JSON file the manifest is read from and saved to
+        """
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.splitter: Optional[list] = None
+        # Chunk hash -> database key (the chunk text); kept in memory only
+        self._chunk_keys: Dict[str, str] = {}
+        self._keys_scanned = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == 1:
+                # Version 1 stored the chunk texts themselves
+                for entry in data["files"].values():
+                    entry["chunks"] = [chunk_hash(chunk) for chunk in entry["chunks"]]
+                data["version"] = MANIFEST_VERSION
+            if data.get("version") == MANIFEST_VERSION:
+                self.files = data["files"]
+                self.splitter = data.get("splitter")
+
+    def diff(self, file_paths: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Compares the current files against the manifest.
+
+        Size and mtime are checked first; only files whose stat changed are
+        hashed, and a file whose content hash still matches is not reported.
+
+        :return: (new or changed paths, removed paths)
+        """
+        changed = []
+        for file_path in file_paths:
+            entry = self.files.get(file_path)
+            stat = os.stat(file_path)
+            if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            if entry is not None and entry["size"] == stat.st_size and entry["sha256"] == file_sha256(file_path):
+                entry["mtime_ns"] = stat.st_mtime_ns
+                continue
+            changed.append(file_path)
+        current = set(file_paths)
+        removed = [file_path for file_path in self.files if file_path not in current]
+        return changed, removed
+
+    def record(self, file_path: str, chunks: List[str]) -> None:
+        stat = os.stat(file_path)
+        hashes = [chunk_hash(chunk) for chunk in chunks]
+        self._chunk_keys.update(zip(hashes, chunks))
+        self.files[file_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(file_path),
+            "chunks": hashes,
+        }
+
+    def pop_chunk_keys(self, hashes: Iterable[str], vector_db: VectorDatabase) -> List[str]:
+        """
+        Returns the database keys of the chunks with `hashes`, forgetting them.
+
+        Keys of chunks recorded in this process are known; any others are
+        found by hashing the database's keys, once per manifest.
+        """
+        hashes = set(hashes)
+        if not self._keys_scanned and not hashes <= self._chunk_keys.keys():
+            self._chunk_keys.update(
+                (chunk_hash(key), key) for key in vector_db.keys() if isinstance(key, str)
+            )
+            self._keys_scanned = True
+        return [self._chunk_keys.pop(digest) for digest in hashes if digest in self._chunk_keys]
+
+    def save(self) -> None:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "splitter": self.splitter, "files": self.files},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.path)
+
+
+async def aingest_incremental(
+    loader: Union[TextFileLoader, PDFLoader],
+    vector_db: VectorDatabase,
+    manifest: FileManifest,
+    splitter: Optional[CharacterTextSplitter] = None,
+) -> Dict[str, int]:
+    """
+    Brings `vector_db` in line with the files under `loader.path`, doing work
+    proportional to what changed since the manifest was last saved.
+
+    Only new or changed files are loaded, split and embedded (and chunks that
+    are already in the database are not re-embedded). Chunks of removed or
+    changed files are deleted unless another current file still contains them.
+    The manifest is saved afterwards; save `vector_db` alongside it.
+
+    :return: Counts of changed/removed files and embedded/deleted chunks
+    """
+    splitter = splitter or CharacterTextSplitter()
+    config = splitter_config(splitter)
+
+    def delete_hashes(hashes: Iterable[str]) -> int:
+        # The database is keyed by chunk text; map recorded hashes back to keys
+        return vector_db.delete_many(manifest.pop_chunk_keys(hashes, vector_db))
+
+    if manifest.splitter != config:
+        # Different chunking invalidates every recorded chunk
+        delete_hashes(chunk for entry in manifest.files.values() for chunk in entry["chunks"])
+        manifest.files, manifest.splitter = {}, config
+
+    changed, removed = manifest.diff(loader.file_paths())
+    new_chunks = {
+        file_path: splitter.split(text)
+        for file_path, text in zip(changed, loader.iter_files(changed))
+    }
+
+    stale = {
+        chunk
+        for file_path in changed + removed
+        for chunk in manifest.files.get(file_path, {}).get("chunks", [])
+    }
+    live = {
+        chunk
+        for file_path, entry in manifest.files.items()
+        if file_path not in new_chunks and file_path not in removed
+        for chunk in entry["chunks"]
+    }
+    for chunks in new_chunks.values():
+        live.update(chunk_hash(chunk) for chunk in chunks)
+    deleted = delete_hashes(stale - live)
+
+    to_embed = list(dict.fromkeys(
+        chunk for chunks in new_chunks.values() for chunk in chunks if chunk not in vector_db
+    ))
+    if to_embed:
+        await vector_db.abuild_from_list(to_embed)
+
+    for file_path in removed:
+        del manifest.files[file_path]
+    for file_path, chunks in new_chunks.items():
+        manifest.record(file_path, chunks)
+    manifest.save()
+
+    return {
+        "changed_files": len(changed),
+        "removed_files": len(removed),
+        "embedded_chunks": len(to_embed),
+        "deleted_chunks": deleted,
+    }
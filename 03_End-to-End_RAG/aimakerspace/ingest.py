@@ -0,0 +1,91 @@
+import asyncio
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from aimakerspace.text_utils import CharacterTextSplitter, Document
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+def _take(chunks: Iterator[Tuple[str, Optional[Dict[str, Any]]]], n: int) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    return list(islice(chunks, n))
+
+
+def _iter_chunks(
+    documents: Iterable[Union[str, Document]], splitter: CharacterTextSplitter
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """Yields (chunk text, metadata) pairs; plain-text documents have no metadata."""
+    for document in documents:
+        if isinstance(document, Document):
+            for chunk in splitter.iter_split_documents([document]):
+                yield chunk.text, chunk.metadata
+        else:
+            for chunk in splitter.split(document):
+                yield chunk, None
+
+
+async def aingest(
+    documents: Iterable[Union[str, Document]],
+    vector_db: VectorDatabase,
+    splitter: Optional[CharacterTextSplitter] = None,
+    batch_size: int = 256,
+    max_pending_batches: int = 4,
+) -> VectorDatabase:
+    """
+    Streams documents through split -> embed -> insert with bounded memory.
+
+    Loading and splitting run lazily in a worker thread, one batch at a time,
+    so file I/O and parsing overlap with in-flight embedding requests. At most
+    `max_pending_batches` batches are buffered between the stages, and batches
+    are inserted in the order they were produced.
+
+    :param documents: Iterable of document texts, e.g. `loader.iter_documents()`,
+        or of `Document`s, e.g. `PDFLoader.iter_pages()`; each chunk of a
+        `Document` is stored with its metadata (requires storage="matrix")
+    :param vector_db: Database to insert into (its embedding model is used)
+    :param splitter: Splitter to chunk documents with (defaults to `CharacterTextSplitter()`)
+    :param batch_size: Number of chunks per embedding request
+    :param max_pending_batches: Bound on batches embedded but not yet inserted
+    :return: The populated `vector_db`
+    """
+    splitter = splitter or CharacterTextSplitter()
+    chunks = _iter_chunks(documents, splitter)
+    pending: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+
+    async def produce():
+        try:
+            while True:
+                batch = await asyncio.to_thread(_take, chunks, batch_size)
+                if not batch:
+                    break
+                embedding = asyncio.ensure_future(
+                    vector_db.embedding_model.async_get_embeddings([text for text, _ in batch])
+                )
+                await pending.put((batch, embedding))
+        except Exception:
+            # Unblock the consumer; the error is re-raised when the producer is awaited
+            await pending.put(None)
+            raise
+        await pending.put(None)
+
+    async def consume():
+        while (item := await pending.get()) is not None:
+            batch, embedding = item
+            texts = [text for text, _ in batch]
+            metadata = [chunk_metadata for _, chunk_metadata in batch]
+            if all(chunk_metadata is None for chunk_metadata in metadata):
+                metadata = None
+            else:
+                metadata = [chunk_metadata or {} for chunk_metadata in metadata]
+            vector_db.insert_many(texts, await embedding, metadata=metadata)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        await consume()
+        await producer
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if item is not None:
+                item[1].cancel()
+    return vector_db
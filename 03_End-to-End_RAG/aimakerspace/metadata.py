@@ -0,0 +1,354 @@
+import json
+import os
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from aimakerspace.fileio import save_array, save_json
+
+
+# Operators accepted in filters; a bare value means "$eq".
+COMPARISONS = {"$eq", "$ne", "$in", "$nin", "$gt", "$gte", "$lt", "$lte", "$all"}
+NEGATIONS = {"$ne", "$nin"}
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime.combine(value, time()).timestamp()
+    return float(value)
+
+
+def _kind_of(value: Any) -> str:
+    if isinstance(value, str):
+        return "category"
+    if isinstance(value, (datetime, date)):
+        return "datetime"
+    if isinstance(value, (bool, int, float, np.number)):
+        return "number"
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return "tags"
+    raise TypeError(f"Unsupported metadata value: {value!r}")
+
+
+def _conditions(condition: Any) -> Dict[str, Any]:
+    if isinstance(condition, dict):
+        unknown = set(condition) - COMPARISONS
+        if unknown:
+            raise ValueError(f"Unknown filter operators: {sorted(unknown)}")
+        return condition
+    return {"$eq": condition}
+
+
+class _CategoryColumn:
+    """Dictionary-encoded strings: int32 codes into `values`, -1 when missing."""
+
+    kind = "category"
+
+    def __init__(self, n_rows: int):
+        self.values: List[str] = []
+        self.lookup: Dict[str, int] = {}
+        self.codes = np.full(n_rows, -1, dtype=np.int32)
+
+    def _encode(self, value: str) -> int:
+        if value not in self.lookup:
+            self.lookup[value] = len(self.values)
+            self.values.append(value)
+        return self.lookup[value]
+
+    def resize(self, n_rows: int) -> None:
+        self.codes = np.concatenate([self.codes, np.full(n_rows - len(self.codes), -1, dtype=np.int32)])
+
+    def set(self, row_ids: np.ndarray, values: List[Any]) -> None:
+        self.codes[row_ids] = [-1 if value is None else self._encode(value) for value in values]
+
+    def take(self, keep: np.ndarray, new_row_ids: np.ndarray) -> None:
+        self.codes = self.codes[keep]
+
+    def get(self, row: int) -> Optional[str]:
+        code = self.codes[row]
+        return None if code < 0 else self.values[code]
+
+    def mask(self, op: str, operand: Any) -> np.ndarray:
+        if op in ("$eq", "$ne"):
+            operand = [operand]
+        elif op not in ("$in", "$nin"):
+            raise ValueError(f"Operator {op} is not supported on string fields")
+        codes = [self.lookup[value] for value in operand if value in self.lookup]
+        hit = np.isin(self.codes, codes)
+        return ~hit if op in NEGATIONS else hit
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"codes": self.codes}
+
+    def state(self) -> Dict[str, Any]:
+        return {"values": self.values}
+
+    @classmethod
+    def restore(cls, arrays: Dict[str, np.ndarray], state: Dict[str, Any]) -> "_CategoryColumn":
+        column = cls(0)
+        column.codes = arrays["codes"]
+        column.values = state["values"]
+        column.lookup = {value: code for code, value in enumerate(column.values)}
+        return column
+
+
+class _NumberColumn:
+    """float64 values (NaN when missing); datetimes are stored as epoch seconds."""
+
+    def __init__(self, n_rows: int, kind: str = "number"):
+        self.kind = kind
+        self.data = np.full(n_rows, np.nan)
+        # Lets `get` hand back ints for columns that only ever held ints
+        self.integer = kind == "number"
+
+    def _encode(self, value: Any) -> float:
+        return _timestamp(value) if self.kind == "datetime" else float(value)
+
+    def resize(self, n_rows: int) -> None:
+        self.data = np.concatenate([self.data, np.full(n_rows - len(self.data), np.nan)])
+
+    def set(self, row_ids: np.ndarray, values: List[Any]) -> None:
+        if self.integer:
+            self.integer = all(
+                value is None or (isinstance(value, (int, np.integer)) and not isinstance(value, bool))
+                for value in values
+            )
+        self.data[row_ids] = [np.nan if value is None else self._encode(value) for value in values]
+
+    def take(self, keep: np.ndarray, new_row_ids: np.ndarray) -> None:
+        self.data = self.data[keep]
+
+    def get(self, row: int) -> Any:
+        value = self.data[row]
+        if np.isnan(value):
+            return None
+        if self.kind == "datetime":
+            return datetime.fromtimestamp(value)
+        return int(value) if self.integer else value.item()
+
+    def mask(self, op: str, operand: Any) -> np.ndarray:
+        data = self.data
+        if op in ("$in", "$nin"):
+            hit = np.isin(data, [self._encode(value) for value in operand])
+            return ~hit if op == "$nin" else hit
+        if op == "$all":
+            raise ValueError("Operator $all is only supported on tag fields")
+        value = self._encode(operand)
+        # Comparisons with NaN are False, so missing values never match
+        return {
+            "$eq": lambda: data == value,
+            "$ne": lambda: data != value,
+            "$gt": lambda: data > value,
+            "$gte": lambda: data >= value,
+            "$lt": lambda: data < value,
+            "$lte": lambda: data <= value,
+        }[op]()
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"data": self.data}
+
+    def state(self) -> Dict[str, Any]:
+        return {"integer": self.integer}
+
+    @classmethod
+    def restore(cls, arrays: Dict[str, np.ndarray], state: Dict[str, Any], kind: str) -> "_NumberColumn":
+        column = cls(0, kind)
+        column.data = arrays["data"]
+        column.integer = state.get("integer", False)
+        return column
+
+
+class _TagsColumn(_CategoryColumn):
+    """
+    Multi-valued strings as (row, code) pairs. Filters reduce to one
+    vectorized comparison over the pairs plus a scatter into a row mask.
+    """
+
+    kind = "tags"
+
+    def __init__(self, n_rows: int):
+        super().__init__(0)
+        self.n_rows = n_rows
+        self.rows = np.empty(0, dtype=np.int32)
+        self.codes = np.empty(0, dtype=np.int32)
+
+    def resize(self, n_rows: int) -> None:
+        self.n_rows = n_rows
+
+    def set(self, row_ids: np.ndarray, values: List[Any]) -> None:
+        keep = ~np.isin(self.rows, row_ids)
+        rows, codes = [], []
+        for row, tags in zip(row_ids.tolist(), values):
+            for tag in tags or ():
+                rows.append(row)
+                codes.append(self._encode(tag))
+        self.rows = np.concatenate([self.rows[keep], np.asarray(rows, dtype=np.int32)])
+        self.codes = np.concatenate([self.codes[keep], np.asarray(codes, dtype=np.int32)])
+
+    def take(self, keep: np.ndarray, new_row_ids: np.ndarray) -> None:
+        kept = keep[self.rows]
+        self.rows = new_row_ids[self.rows[kept]].astype(np.int32)
+        self.codes = self.codes[kept]
+        self.n_rows = int(keep.sum())
+
+    def get(self, row: int) -> List[str]:
+        return [self.values[code] for code in self.codes[self.rows == row]]
+
+    def _rows_with(self, codes: List[int]) -> np.ndarray:
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.rows[np.isin(self.codes, codes)]] = True
+        return mask
+
+    def mask(self, op: str, operand: Any) -> np.ndarray:
+        if op in ("$eq", "$ne"):
+            operand = [operand]
+        elif op not in ("$in", "$nin", "$all"):
+            raise ValueError(f"Operator {op} is not supported on tag fields")
+        if op == "$all":
+            mask = np.ones(self.n_rows, dtype=bool)
+            for tag in operand:
+                mask &= self._rows_with([self.lookup.get(tag, -2)])
+            return mask
+        hit = self._rows_with([self.lookup[tag] for tag in operand if tag in self.lookup])
+        return ~hit if op in NEGATIONS else hit
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"rows": self.rows, "codes": self.codes}
+
+    def state(self) -> Dict[str, Any]:
+        return {"values": self.values, "n_rows": self.n_rows}
+
+    @classmethod
+    def restore(cls, arrays: Dict[str, np.ndarray], state: Dict[str, Any]) -> "_TagsColumn":
+        column = cls(state["n_rows"])
+        column.rows, column.codes = arrays["rows"], arrays["codes"]
+        column.values = state["values"]
+        column.lookup = {value: code for code, value in enumerate(column.values)}
+        return column
+
+
+class MetadataStore:
+    def __init__(self):
+        """
+        Column store of per-row metadata, aligned with the rows of a matrix
+        `VectorDatabase`.
+
+        Each field becomes a typed NumPy column on first use: strings are
+        dictionary-encoded, numbers and datetimes are float64, and lists of
+        strings are tags. A filter compiles to a boolean row mask with a few
+        vectorized comparisons, so it can be applied before any scoring.
+        """
+        self.n_rows = 0
+        self.columns: Dict[str, Any] = {}
+
+    def resize(self, n_rows: int) -> None:
+        """Grows every column to `n_rows`, filling the new rows with missing values."""
+        if n_rows > self.n_rows:
+            for column in self.columns.values():
+                column.resize(n_rows)
+            self.n_rows = n_rows
+
+    def _column(self, name: str, sample: Any):
+        column = self.columns.get(name)
+        if column is None:
+            kind = _kind_of(sample)
+            if kind == "category":
+                column = _CategoryColumn(self.n_rows)
+            elif kind == "tags":
+                column = _TagsColumn(self.n_rows)
+            else:
+                column = _NumberColumn(self.n_rows, kind)
+            self.columns[name] = column
+        elif _kind_of(sample) != column.kind:
+            raise TypeError(f"Field {name!r} holds {column.kind} values, got {sample!r}")
+        return column
+
+    def set(self, row_ids: List[int], metadatas: List[Optional[Dict[str, Any]]]) -> None:
+        """
+        Replaces the metadata of `row_ids` (growing the store if needed);
+        fields a row does not mention become missing for that row.
+        """
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        if len(row_ids) == 0:
+            return
+        self.resize(int(row_ids.max()) + 1)
+        metadatas = [metadata or {} for metadata in metadatas]
+        for metadata in metadatas:
+            for name, value in metadata.items():
+                if value is not None:
+                    self._column(name, value)
+        for name, column in self.columns.items():
+            column.set(row_ids, [metadata.get(name) for metadata in metadatas])
+
+    def take(self, keep: np.ndarray) -> None:
+        """Keeps only the rows where `keep` is True, preserving their order."""
+        new_row_ids = np.where(keep, np.cumsum(keep) - 1, -1)
+        for column in self.columns.values():
+            column.take(keep, new_row_ids)
+        self.n_rows = int(keep.sum())
+
+    def get(self, row: int) -> Dict[str, Any]:
+        metadata = {}
+        for name, column in self.columns.items():
+            value = column.get(row)
+            if value is not None and value != []:
+                metadata[name] = value
+        return metadata
+
+    def mask(self, filter: Dict[str, Any]) -> np.ndarray:
+        """
+        Evaluates a filter to a boolean mask over the rows.
+
+        Fields are ANDed; each maps to a value (equality, or "contains" for
+        tags) or to a dict of operators: $eq, $ne, $in, $nin, $gt, $gte, $lt,
+        $lte, and $all for tags. Rows missing a field only match $ne/$nin.
+
+            {"source": "loans.pdf", "page": {"$gte": 3}, "tags": {"$in": ["pslf"]}}
+        """
+        mask = np.ones(self.n_rows, dtype=bool)
+        for name, condition in filter.items():
+            column = self.columns.get(name)
+            for op, operand in _conditions(condition).items():
+                if column is None:
+                    if op not in NEGATIONS:
+                        mask[:] = False
+                    continue
+                mask &= column.mask(op, operand)
+        return mask
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        schema = {}
+        for i, (name, column) in enumerate(self.columns.items()):
+            for array_name, array in column.arrays().items():
+                save_array(os.path.join(path, f"{i}_{array_name}.npy"), array)
+            schema[name] = {"id": i, "kind": column.kind, **column.state()}
+        save_json(
+            os.path.join(path, "schema.json"),
+            {"n_rows": self.n_rows, "columns": schema},
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "MetadataStore":
+        with open(os.path.join(path, "schema.json"), encoding="utf-8") as f:
+            schema = json.load(f)
+        store = cls()
+        store.n_rows = schema["n_rows"]
+        for name, state in schema["columns"].items():
+            kind = state["kind"]
+            array_names = {"category": ["codes"], "tags": ["rows", "codes"]}.get(kind, ["data"])
+            arrays = {
+                array_name: np.load(os.path.join(path, f"{state['id']}_{array_name}.npy"))
+                for array_name in array_names
+            }
+            if kind == "category":
+                store.columns[name] = _CategoryColumn.restore(arrays, state)
+            elif kind == "tags":
+                store.columns[name] = _TagsColumn.restore(arrays, state)
+            else:
+                store.columns[name] = _NumberColumn.restore(arrays, state, kind)
+        return store
@@ -1,45 +1,302 @@
 from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import httpx
 import os
+from aimakerspace.openai_utils.embedding import _is_retryable, backoff_delay, estimate_tokens
+from aimakerspace.openai_utils.rate_limit import RateLimiter
+from aimakerspace.openai_utils.response_cache import ResponseCache
 
 load_dotenv()
 
 
 class ChatOpenAI:
-    def __init__(self, model_name: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        model_name: str = "gpt-4o-mini",
+        base_url: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = 2,
+        cache: Optional[ResponseCache] = None,
+    ):
+        """
+        The model owns long-lived sync and async OpenAI clients whose HTTP
+        connection pools are reused across calls. Close them with `close()` /
+        `aclose()` or by using the model as a (async) context manager.
+
+        :param model_name: OpenAI chat model to call
+        :param base_url: Override the API base URL (defaults to the OpenAI API)
+        :param max_connections: Maximum open connections per client
+        :param max_keepalive_connections: Idle connections kept for reuse
+        :param keepalive_expiry: Seconds an idle connection is kept alive
+        :param timeout: Overall request timeout in seconds
+        :param connect_timeout: Connection establishment timeout in seconds
+        :param max_retries: Retries performed by the OpenAI client
+        :param cache: Optional response cache; hits skip the API for `run`
+            (with `text_only`), `astream` and `abatch` (with `text_only`)
+        """
         self.model_name = model_name
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         if self.openai_api_key is None:
             raise ValueError("OPENAI_API_KEY is not set")
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.cache = cache
+        self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._closing: Set[asyncio.Task] = set()
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            self._client = OpenAI(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=httpx.Client(limits=self.limits, timeout=self.timeout),
+            )
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        # An httpx.AsyncClient's pool is tied to the event loop that opened it,
+        # so a new loop (e.g. another asyncio.run) gets a fresh client.
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            if self._async_client is not None:
+                self._close_stale_async_client(self._async_client, self._async_client_loop)
+            self._async_http_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._async_client = AsyncOpenAI(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=self._async_http_client,
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def aconnect(self) -> None:
+        """
+        Opens a pooled connection to the API ahead of a request, so a caller
+        can overlap the TCP/TLS handshake with other work (e.g. retrieval).
+
+        If the pool already holds an idle connection this costs one round
+        trip on it. Failures are ignored; the request that follows connects
+        (and reports errors) as usual.
+        """
+        client = self.async_client
+        try:
+            # An unauthenticated HEAD: it costs nothing, and its connection stays pooled
+            await self._async_http_client.head(str(client.base_url))
+        except httpx.HTTPError:
+            pass
+
+    def _close_stale_async_client(self, client: AsyncOpenAI, client_loop: asyncio.AbstractEventLoop) -> None:
+        """Closes a client opened on a previous event loop instead of leaking its pool."""
+        if client_loop.is_running():
+            # That loop still runs in another thread: close the client there
+            asyncio.run_coroutine_threadsafe(client.close(), client_loop)
+            return
+        # Otherwise close it from the current loop. If its loop is already
+        # closed, its connections cannot shut down cleanly and raise; the
+        # client is still marked closed and its pool released.
+        task = asyncio.get_running_loop().create_task(self._aclose_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _aclose_quietly(client: AsyncOpenAI) -> None:
+        try:
+            await client.close()
+        except RuntimeError:
+            pass
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._async_client is not None:
+            if self._async_client_loop is loop:
+                await self._async_client.close()
+            else:
+                self._close_stale_async_client(self._async_client, self._async_client_loop)
+            self._async_client = None
+            self._async_client_loop = None
+            self._async_http_client = None
+        await asyncio.gather(*(task for task in self._closing if task.get_loop() is loop))
+        self.close()
+
+    def __enter__(self) -> "ChatOpenAI":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "ChatOpenAI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
 
     def run(self, messages, text_only: bool = True, **kwargs):
         if not isinstance(messages, list):
             raise ValueError("messages must be a list")
 
-        client = OpenAI()
-        response = client.chat.completions.create(
+        use_cache = self.cache is not None and text_only
+        if use_cache:
+            chunks = self.cache.lookup(self.model_name, messages, kwargs)
+            if chunks is not None:
+                return "".join(chunks)
+
+        response = self.client.chat.completions.create(
             model=self.model_name, messages=messages, **kwargs
         )
 
         if text_only:
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            if use_cache and content is not None:
+                self.cache.store(self.model_name, messages, kwargs, [content])
+            return content
 
         return response
-    
+
+    @staticmethod
+    def _estimate_request_tokens(messages: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> int:
+        """Prompt tokens plus the completion budget, as counted against a TPM limit."""
+        prompt = sum(
+            estimate_tokens(content if isinstance(content, str) else str(content)) + 4
+            for content in (message.get("content") or "" for message in messages)
+        )
+        completion = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or 0
+        return prompt + completion
+
+    async def abatch(
+        self,
+        list_of_message_lists: List[List[Dict[str, Any]]],
+        max_concurrency: int = 8,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        text_only: bool = True,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        return_exceptions: bool = False,
+        **kwargs
+    ) -> list:
+        """
+        Runs many completions concurrently under request and token budgets.
+
+        Requests are admitted through per-minute token buckets; token usage is
+        estimated up front and corrected with the reported usage afterwards.
+        429s, 5xx and connection errors are retried with jittered exponential
+        backoff (honouring Retry-After).
+
+        :param list_of_message_lists: One message list per completion
+        :param max_concurrency: Maximum number of requests in flight
+        :param rpm: Requests-per-minute budget (unlimited if None)
+        :param tpm: Tokens-per-minute budget (unlimited if None)
+        :param text_only: Return message contents instead of full responses
+        :param max_retries: Retries per request before giving up
+        :param backoff_base: Initial retry delay in seconds, doubled per attempt
+        :param backoff_max: Cap on a single retry delay in seconds
+        :param return_exceptions: Put failures in the result list instead of raising
+        :return: Results in the same order as `list_of_message_lists`
+        """
+        for messages in list_of_message_lists:
+            if not isinstance(messages, list):
+                raise ValueError("messages must be a list")
+
+        # Retries are handled here, so the client must not retry on its own
+        client = self.async_client.with_options(max_retries=0)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        requests = RateLimiter(rpm) if rpm else None
+        tokens = RateLimiter(tpm) if tpm else None
+
+        use_cache = self.cache is not None and text_only
+
+        async def complete(messages):
+            if use_cache:
+                chunks = await self.cache.alookup(self.model_name, messages, kwargs)
+                if chunks is not None:
+                    return "".join(chunks)
+            estimate = self._estimate_request_tokens(messages, kwargs)
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    if requests is not None:
+                        await requests.acquire()
+                    if tokens is not None:
+                        await tokens.acquire(estimate)
+                    try:
+                        response = await client.chat.completions.create(
+                            model=self.model_name, messages=messages, **kwargs
+                        )
+                    except Exception as e:
+                        if attempt == max_retries or not _is_retryable(e):
+                            raise
+                        await asyncio.sleep(backoff_delay(attempt, e, backoff_base, backoff_max))
+                        continue
+                    if tokens is not None and response.usage is not None:
+                        tokens.adjust(response.usage.total_tokens - estimate)
+                    if not text_only:
+                        return response
+                    content = response.choices[0].message.content
+                    if use_cache and content is not None:
+                        await self.cache.astore(self.model_name, messages, kwargs, [content])
+                    return content
+
+        # gather preserves input order regardless of completion order
+        return await asyncio.gather(
+            *[complete(messages) for messages in list_of_message_lists],
+            return_exceptions=return_exceptions,
+        )
+
     async def astream(self, messages, **kwargs):
         if not isinstance(messages, list):
             raise ValueError("messages must be a list")
-        
-        client = AsyncOpenAI()
 
-        stream = await client.chat.completions.create(
+        if self.cache is not None:
+            chunks = await self.cache.alookup(self.model_name, messages, kwargs)
+            if chunks is not None:
+                for content in chunks:
+                    yield content
+                return
+
+        stream = await self.async_client.chat.completions.create(
             model=self.model_name,
             messages=messages,
             stream=True,
             **kwargs
         )
 
+        chunks = []
+        finish_reason = None
         async for chunk in stream:
+            if not chunk.choices:
+                continue
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
             content = chunk.choices[0].delta.content
             if content is not None:
+                chunks.append(content)
                 yield content
+
+        # Only streams the API finished with text are cached; an abandoned one
+        # never gets here, and a cut-off or tool-call-only one has no finish
+        # reason or no chunks
+        if self.cache is not None and finish_reason is not None and chunks:
+            await self.cache.astore(self.model_name, messages, kwargs, chunks)
@@ -1,13 +1,80 @@
 from dotenv import load_dotenv
 from openai import AsyncOpenAI, OpenAI
 import openai
-from typing import List
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import os
+import random
 import asyncio
+from aimakerspace.openai_utils.embedding_cache import EmbeddingCache, cache_key
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-leaning token estimate (~3 characters per token for English)."""
+    return len(text) // 3 + 1
+
+
+def pack_batches(
+    list_of_text: List[str], max_batch_tokens: int, max_batch_size: int
+) -> List[List[str]]:
+    """
+    Greedily packs texts, in order, into batches under both a token and an item budget.
+
+    A single text larger than `max_batch_tokens` still gets a batch of its own.
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for text in list_of_text:
+        tokens = estimate_tokens(text)
+        if batch and (batch_tokens + tokens > max_batch_tokens or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and transport failures are worth retrying."""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def backoff_delay(attempt: int, error: Exception, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff, honouring a server Retry-After header."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        floor = float(retry_after) if retry_after else 0.0
+    except ValueError:
+        floor = 0.0
+    return max(floor, random.uniform(0, min(cap, base * 2**attempt)))
 
 
 class EmbeddingModel:
-    def __init__(self, embeddings_model_name: str = "text-embedding-3-small"):
+    def __init__(
+        self,
+        embeddings_model_name: str = "text-embedding-3-small",
+        cache: Optional[EmbeddingCache] = None,
+        max_concurrency: int = 8,
+        max_batch_tokens: int = 250_000,
+        max_batch_size: int = 2048,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        """
+        :param embeddings_model_name: OpenAI embedding model to call
+        :param cache: Optional embedding cache; only cache misses are sent to the API
+        :param max_concurrency: Maximum number of embedding requests in flight
+        :param max_batch_tokens: Estimated token budget per request
+        :param max_batch_size: Maximum number of inputs per request
+        :param max_retries: Retries for 429/5xx/connection errors before giving up
+        :param backoff_base: Initial retry delay in seconds, doubled per attempt
+        :param backoff_max: Cap on a single retry delay in seconds
+        """
         load_dotenv()
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.async_client = AsyncOpenAI()
@@ -19,15 +86,90 @@ class EmbeddingModel:
             )
         openai.api_key = self.openai_api_key
         self.embeddings_model_name = embeddings_model_name
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @staticmethod
+    def _partition(
+        keys: List[str], list_of_text: List[str], cached: Dict[str, np.ndarray]
+    ) -> Tuple[List[str], Dict[str, List[float]], List[str]]:
+        found = {key: vector.tolist() for key, vector in cached.items()}
+        misses = {}
+        for key, text in zip(keys, list_of_text):
+            if key not in found:
+                misses.setdefault(key, text)
+        return keys, found, list(misses.values())
+
+    def _lookup(self, list_of_text: List[str]) -> Tuple[List[str], Dict[str, List[float]], List[str]]:
+        """Returns (keys per text, cached embeddings by key, unique texts still to embed)."""
+        keys = [cache_key(self.embeddings_model_name, text) for text in list_of_text]
+        return self._partition(keys, list_of_text, self.cache.get_many(list(set(keys))))
+
+    async def _alookup(self, list_of_text: List[str]) -> Tuple[List[str], Dict[str, List[float]], List[str]]:
+        """`_lookup` without blocking the event loop on a disk-backed cache."""
+        keys = [cache_key(self.embeddings_model_name, text) for text in list_of_text]
+        return self._partition(keys, list_of_text, await self.cache.aget_many(list(set(keys))))
+
+    def _fresh(self, texts: List[str], embeddings: List[List[float]]) -> Dict[str, List[float]]:
+        return {
+            cache_key(self.embeddings_model_name, text): embedding
+            for text, embedding in zip(texts, embeddings)
+        }
+
+    def _store(self, keys: List[str], found: Dict[str, List[float]], texts: List[str], embeddings: List[List[float]]) -> List[List[float]]:
+        """Caches freshly computed embeddings and returns one embedding per key."""
+        fresh = self._fresh(texts, embeddings)
+        if fresh:
+            self.cache.set_many(fresh)
+        found.update(fresh)
+        return [found[key] for key in keys]
+
+    async def _astore(self, keys: List[str], found: Dict[str, List[float]], texts: List[str], embeddings: List[List[float]]) -> List[List[float]]:
+        """`_store` without blocking the event loop on a disk-backed cache."""
+        fresh = self._fresh(texts, embeddings)
+        if fresh:
+            await self.cache.aset_many(fresh)
+        found.update(fresh)
+        return [found[key] for key in keys]
 
     async def async_get_embeddings(self, list_of_text: List[str]) -> List[List[float]]:
-        embedding_response = await self.async_client.embeddings.create(
-            input=list_of_text, model=self.embeddings_model_name
-        )
+        if self.cache is None:
+            return await self._async_embed(list_of_text)
+        keys, found, misses = await self._alookup(list_of_text)
+        embeddings = await self._async_embed(misses) if misses else []
+        return await self._astore(keys, found, misses, embeddings)
+
+    async def _async_embed(self, list_of_text: List[str]) -> List[List[float]]:
+        """Embeds texts in token-packed batches with bounded concurrency, in input order."""
+        batches = pack_batches(list_of_text, self.max_batch_tokens, self.max_batch_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
 
-        return [embeddings.embedding for embeddings in embedding_response.data]
+        async def process_batch(batch):
+            async with semaphore:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        embedding_response = await self.async_client.embeddings.create(
+                            input=batch, model=self.embeddings_model_name
+                        )
+                        return [embeddings.embedding for embeddings in embedding_response.data]
+                    except Exception as e:
+                        if attempt == self.max_retries or not _is_retryable(e):
+                            raise
+                        await asyncio.sleep(backoff_delay(attempt, e, self.backoff_base, self.backoff_max))
+
+        # gather preserves batch order, so flattening keeps outputs aligned with inputs
+        results = await asyncio.gather(*[process_batch(batch) for batch in batches])
+        return [embedding for batch_result in results for embedding in batch_result]
 
     async def async_get_embedding(self, text: str) -> List[float]:
+        if self.cache is not None:
+            return (await self.async_get_embeddings([text]))[0]
+
         embedding = await self.async_client.embeddings.create(
             input=text, model=self.embeddings_model_name
         )
@@ -35,13 +177,25 @@ class EmbeddingModel:
         return embedding.data[0].embedding
 
     def get_embeddings(self, list_of_text: List[str]) -> List[List[float]]:
-        embedding_response = self.client.embeddings.create(
-            input=list_of_text, model=self.embeddings_model_name
-        )
+        if self.cache is None:
+            return self._embed(list_of_text)
+        keys, found, misses = self._lookup(list_of_text)
+        embeddings = self._embed(misses) if misses else []
+        return self._store(keys, found, misses, embeddings)
 
-        return [embeddings.embedding for embeddings in embedding_response.data]
+    def _embed(self, list_of_text: List[str]) -> List[List[float]]:
+        embeddings = []
+        for batch in pack_batches(list_of_text, self.max_batch_tokens, self.max_batch_size):
+            embedding_response = self.client.embeddings.create(
+                input=batch, model=self.embeddings_model_name
+            )
+            embeddings.extend(embedding.embedding for embedding in embedding_response.data)
+        return embeddings
 
     def get_embedding(self, text: str) -> List[float]:
+        if self.cache is not None:
+            return self.get_embeddings([text])[0]
+
         embedding = self.client.embeddings.create(
             input=text, model=self.embeddings_model_name
         )
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def cache_key(model_name: str, text: str) -> str:
+    """Content address of an embedding: a hash of the model name and the text."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(ABC):
+    """Maps cache keys (see `cache_key`) to float32 embedding vectors."""
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached vectors for the subset of `keys` that are present."""
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Stores vectors under their keys."""
+
+    async def aget_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        return self.get_many(keys)
+
+    async def aset_many(self, items: Dict[str, np.ndarray]) -> None:
+        self.set_many(items)
+
+
+class InMemoryEmbeddingCache(EmbeddingCache):
+    def __init__(self, max_entries: int = 100_000):
+        """
+        Least-recently-used in-process cache.
+
+        :param max_entries: Number of vectors kept before the oldest are evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+        return found
+
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._entries[key] = np.asarray(vector, dtype=np.float32)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteEmbeddingCache(EmbeddingCache):
+    # SQLite caps the number of bound parameters per statement.
+    _MAX_PARAMS = 900
+
+    def __init__(self, path: str = ".cache/embeddings.sqlite"):
+        """
+        On-disk cache storing each vector as a float32 blob in a SQLite table.
+
+        :param path: Database file; parent directories are created if needed
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self._MAX_PARAMS):
+                batch = keys[start : start + self._MAX_PARAMS]
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in items.items()
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+            )
+
+    async def aget_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        # Queries run in a worker thread so they do not block the event loop
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aset_many(self, items: Dict[str, np.ndarray]) -> None:
+        await asyncio.to_thread(self.set_many, items)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class TieredEmbeddingCache(EmbeddingCache):
+    def __init__(
+        self,
+        memory: Optional[InMemoryEmbeddingCache] = None,
+        disk: Optional[EmbeddingCache] = None,
+    ):
+        """
+        Checks the in-memory tier first, then the disk tier, promoting disk hits.
+
+        :param memory: Fast tier (defaults to an `InMemoryEmbeddingCache`)
+        :param disk: Persistent tier (defaults to a `SQLiteEmbeddingCache`)
+        """
+        self.memory = memory or InMemoryEmbeddingCache()
+        self.disk = disk or SQLiteEmbeddingCache()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = self.memory.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_disk = self.disk.get_many(missing)
+            if from_disk:
+                self.memory.set_many(from_disk)
+                found.update(from_disk)
+        return found
+
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        self.memory.set_many(items)
+        self.disk.set_many(items)
+
+    async def aget_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = self.memory.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            from_disk = await self.disk.aget_many(missing)
+            if from_disk:
+                self.memory.set_many(from_disk)
+                found.update(from_disk)
+        return found
+
+    async def aset_many(self, items: Dict[str, np.ndarray]) -> None:
+        self.memory.set_many(items)
+        await self.disk.aset_many(items)
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    def __init__(self, per_minute: float):
+        """
+        Token bucket for an OpenAI-style per-minute budget (requests or tokens).
+
+        The bucket starts full and refills continuously at `per_minute / 60`
+        units per second. Waiters are served in arrival order.
+
+        :param per_minute: Units allowed per minute
+        """
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Waits until `amount` units are available and takes them."""
+        # A request larger than the whole budget would otherwise wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Charges (positive) or refunds (negative) units after the fact, e.g. the
+        difference between estimated and reported token usage. The balance may
+        go negative, which delays subsequent acquires.
+        """
+        self._refill()
+        self.available = min(self.capacity, self.available - amount)
@@ -0,0 +1,329 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aimakerspace.openai_utils.embedding import EmbeddingModel
+from aimakerspace.openai_utils.embedding_cache import InMemoryEmbeddingCache, cache_key
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+Messages = List[Dict[str, Any]]
+
+
+def response_cache_key(model_name: str, messages: Messages, params: Dict[str, Any]) -> str:
+    """Hash of everything that determines a completion: model, messages and sampling kwargs."""
+    payload = json.dumps(
+        {"model": model_name, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    Maps cache keys (see `response_cache_key`) to the text chunks of a
+    completion, so a hit can be replayed by `run` (joined) or `astream`.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[List[str]]:
+        """Returns the cached chunks for `key`, or None if absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, chunks: List[str]) -> None:
+        """Stores chunks under `key`."""
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, List[str]]]:
+        """Returns (expiry timestamp, chunks) for `key`; infinity if it never expires."""
+        chunks = self.get(key)
+        return None if chunks is None else (float("inf"), chunks)
+
+    def lookup(self, model_name: str, messages: Messages, params: Dict[str, Any]) -> Optional[List[str]]:
+        return self.get(response_cache_key(model_name, messages, params))
+
+    def store(self, model_name: str, messages: Messages, params: Dict[str, Any], chunks: List[str]) -> None:
+        self.set(response_cache_key(model_name, messages, params), chunks)
+
+    async def alookup(self, model_name: str, messages: Messages, params: Dict[str, Any]) -> Optional[List[str]]:
+        return self.lookup(model_name, messages, params)
+
+    async def astore(self, model_name: str, messages: Messages, params: Dict[str, Any], chunks: List[str]) -> None:
+        self.store(model_name, messages, params, chunks)
+
+
+class InMemoryResponseCache(ResponseCache):
+    def __init__(self, max_entries: int = 10_000, ttl: Optional[float] = None):
+        """
+        Least-recently-used in-process cache.
+
+        :param max_entries: Number of responses kept before the oldest are evicted
+        :param ttl: Seconds a response stays valid (forever if None)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        entry = self.get_entry(key)
+        return entry[1] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, List[str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, chunks: List[str], expires: Optional[float] = None) -> None:
+        """
+        Stores chunks under `key`.
+
+        :param expires: Expiry timestamp carried over from another cache; the
+            entry expires at the earlier of it and this cache's own ttl
+        """
+        own_expiry = time.time() + self.ttl if self.ttl is not None else float("inf")
+        expires = own_expiry if expires is None else min(expires, own_expiry)
+        with self._lock:
+            self._entries[key] = (expires, list(chunks))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteResponseCache(ResponseCache):
+    def __init__(self, path: str = ".cache/responses.sqlite", ttl: Optional[float] = None):
+        """
+        On-disk cache storing each response's chunks as JSON in a SQLite table.
+
+        Expired rows are never returned and are purged when the cache is
+        opened or `evict_expired` is called.
+
+        :param path: Database file; parent directories are created if needed
+        :param ttl: Seconds a response stays valid (forever if None)
+        """
+        self.path = path
+        self.ttl = ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, chunks TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        self.evict_expired()
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl if self.ttl is not None else float("-inf")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        entry = self.get_entry(key)
+        return entry[1] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, List[str]]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT chunks, created FROM responses WHERE key = ? AND created >= ?",
+                (key, self._cutoff()),
+            ).fetchone()
+        if row is None:
+            return None
+        expires = row[1] + self.ttl if self.ttl is not None else float("inf")
+        return expires, json.loads(row[0])
+
+    def set(self, key: str, chunks: List[str]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, chunks, created) VALUES (?, ?, ?)",
+                (key, json.dumps(chunks, ensure_ascii=False), time.time()),
+            )
+
+    def evict_expired(self) -> int:
+        """Deletes expired rows and returns how many were removed."""
+        if self.ttl is None:
+            return 0
+        with self._lock, self._connection:
+            return self._connection.execute(
+                "DELETE FROM responses WHERE created < ?", (self._cutoff(),)
+            ).rowcount
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class TieredResponseCache(ResponseCache):
+    def __init__(
+        self,
+        memory: Optional[InMemoryResponseCache] = None,
+        disk: Optional[ResponseCache] = None,
+    ):
+        """
+        Checks the in-memory tier first, then the disk tier, promoting disk hits.
+        A promoted entry keeps its disk expiry, so it is not served past it.
+
+        :param memory: Fast tier (defaults to an `InMemoryResponseCache`)
+        :param disk: Persistent tier (defaults to a `SQLiteResponseCache`)
+        """
+        self.memory = memory or InMemoryResponseCache()
+        self.disk = disk or SQLiteResponseCache()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        chunks = self.memory.get(key)
+        if chunks is None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                expires, chunks = entry
+                self.memory.set(key, chunks, expires=expires)
+        return chunks
+
+    def set(self, key: str, chunks: List[str]) -> None:
+        self.memory.set(key, chunks)
+        self.disk.set(key, chunks)
+
+
+class SemanticResponseCache(ResponseCache):
+    def __init__(
+        self,
+        embedding_model: Optional[EmbeddingModel] = None,
+        exact: Optional[ResponseCache] = None,
+        threshold: float = 0.95,
+    ):
+        """
+        Falls back to near-duplicate matching when there is no exact hit.
+
+        Requests are grouped by everything except the final message (model,
+        sampling kwargs and earlier turns must match exactly); within a group
+        the final message is embedded and the most similar cached one is
+        reused if its cosine similarity reaches `threshold`. The similarity
+        index lives in memory, so after a restart only exact hits from a
+        persistent `exact` cache are served until it is repopulated. Entries
+        the exact cache has evicted are dropped from the index when a lookup
+        runs into them.
+
+        :param embedding_model: Model used to embed final messages
+        :param exact: Exact cache holding the responses (defaults to `InMemoryResponseCache()`)
+        :param threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.embedding_model = embedding_model or EmbeddingModel()
+        self.exact = exact or InMemoryResponseCache()
+        self.threshold = threshold
+        self._indexes: Dict[str, VectorDatabase] = {}
+        # Each query is embedded on lookup and again on store after a miss
+        self._vectors = InMemoryEmbeddingCache(max_entries=1024)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        return self.exact.get(key)
+
+    def set(self, key: str, chunks: List[str]) -> None:
+        self.exact.set(key, chunks)
+
+    @staticmethod
+    def _query(model_name: str, messages: Messages, params: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Returns (group key, final message text), or None if not text."""
+        content = messages[-1].get("content") if messages else None
+        if not isinstance(content, str):
+            return None
+        return response_cache_key(model_name, messages[:-1], params), content
+
+    def _vector_key(self, text: str) -> str:
+        return cache_key(self.embedding_model.embeddings_model_name, text)
+
+    def _match(self, group: str, vector: np.ndarray) -> Optional[List[str]]:
+        while True:
+            with self._lock:
+                index = self._indexes.get(group)
+                results = index.search(vector, k=1) if index is not None and len(index) else []
+            if not results or results[0][1] < self.threshold:
+                return None
+            key = results[0][0]
+            chunks = self.get(key)
+            if chunks is not None:
+                return chunks
+            # The exact tier evicted it (LRU or TTL): forget it and try the next best match
+            self._discard(group, key)
+
+    def _discard(self, group: str, key: str) -> None:
+        with self._lock:
+            index = self._indexes.get(group)
+            if index is None:
+                return
+            index.delete_many([key])
+            if not len(index):
+                del self._indexes[group]
+
+    def _add(self, group: str, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            index = self._indexes.get(group)
+            if index is None:
+                index = self._indexes[group] = VectorDatabase(self.embedding_model, storage="matrix")
+            index.insert(key, vector)
+
+    def _cached_vector(self, text: str) -> Optional[np.ndarray]:
+        return self._vectors.get_many([self._vector_key(text)]).get(self._vector_key(text))
+
+    def _remember_vector(self, text: str, vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        self._vectors.set_many({self._vector_key(text): vector})
+        return vector
+
+    def lookup(self, model_name: str, messages: Messages, params: Dict[str, Any]) -> Optional[List[str]]:
+        chunks = super().lookup(model_name, messages, params)
+        query = self._query(model_name, messages, params)
+        if chunks is not None or query is None or query[0] not in self._indexes:
+            return chunks
+        group, text = query
+        vector = self._cached_vector(text)
+        if vector is None:
+            vector = self._remember_vector(text, self.embedding_model.get_embedding(text))
+        return self._match(group, vector)
+
+    async def alookup(self, model_name: str, messages: Messages, params: Dict[str, Any]) -> Optional[List[str]]:
+        chunks = super().lookup(model_name, messages, params)
+        query = self._query(model_name, messages, params)
+        if chunks is not None or query is None or query[0] not in self._indexes:
+            return chunks
+        group, text = query
+        vector = self._cached_vector(text)
+        if vector is None:
+            vector = self._remember_vector(text, await self.embedding_model.async_get_embedding(text))
+        return self._match(group, vector)
+
+    def store(self, model_name: str, messages: Messages, params: Dict[str, Any], chunks: List[str]) -> None:
+        key = response_cache_key(model_name, messages, params)
+        self.set(key, chunks)
+        query = self._query(model_name, messages, params)
+        if query is not None:
+            group, text = query
+            vector = self._cached_vector(text)
+            if vector is None:
+                vector = self._remember_vector(text, self.embedding_model.get_embedding(text))
+            self._add(group, key, vector)
+
+    async def astore(self, model_name: str, messages: Messages, params: Dict[str, Any], chunks: List[str]) -> None:
+        key = response_cache_key(model_name, messages, params)
+        self.set(key, chunks)
+        query = self._query(model_name, messages, params)
+        if query is not None:
+            group, text = query
+            vector = self._cached_vector(text)
+            if vector is None:
+                vector = self._remember_vector(text, await self.embedding_model.async_get_embedding(text))
+            self._add(group, key, vector)
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aimakerspace.openai_utils.chatmodel import ChatOpenAI
+from aimakerspace.openai_utils.prompts import SystemRolePrompt, UserRolePrompt
+from aimakerspace.vectordatabase import VectorDatabase
+
+
+RAG_SYSTEM_TEMPLATE = """You are a knowledgeable assistant that answers questions based strictly on provided context.
+
+Instructions:
+- Only answer questions using information from the provided context
+- If the context doesn't contain relevant information, respond with "I don't know"
+- Be accurate and cite specific parts of the context when possible
+- Only use the provided context. Do not use external knowledge."""
+
+RAG_USER_TEMPLATE = """Context Information:
+{context}
+
+Question: {user_query}
+
+Please provide your answer based solely on the context above."""
+
+
+class StageTimings(dict):
+    """Seconds spent per pipeline stage, filled in as the stages run."""
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self[name] = time.perf_counter() - start
+
+
+class RetrievalAugmentedQAPipeline:
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        vector_db_retriever: VectorDatabase,
+        system_prompt: Optional[SystemRolePrompt] = None,
+        user_prompt: Optional[UserRolePrompt] = None,
+        k: int = 4,
+    ):
+        """
+        Async retrieve -> prompt -> generate pipeline over the aimakerspace parts.
+
+        :param llm: Chat model the answer is streamed from
+        :param vector_db_retriever: Populated database; its embedding model embeds queries
+        :param system_prompt: System message template (defaults to RAG_SYSTEM_TEMPLATE)
+        :param user_prompt: User message template with `{context}` and `{user_query}`
+        :param k: Number of chunks retrieved per query
+        """
+        self.llm = llm
+        self.vector_db_retriever = vector_db_retriever
+        self.system_prompt = system_prompt or SystemRolePrompt(RAG_SYSTEM_TEMPLATE)
+        self.user_prompt = user_prompt or UserRolePrompt(RAG_USER_TEMPLATE)
+        self.k = k
+
+    @staticmethod
+    def format_context(context_list: List[Tuple[str, float]]) -> str:
+        return "\n\n".join(
+            f"[Source {i}]: {context}" for i, (context, _) in enumerate(context_list, 1)
+        )
+
+    def build_messages(self, user_query: str, context_list: List[Tuple[str, float]]) -> List[Dict[str, str]]:
+        return [
+            self.system_prompt.create_message(),
+            self.user_prompt.create_message(
+                context=self.format_context(context_list), user_query=user_query
+            ),
+        ]
+
+    async def _stream(
+        self,
+        messages: List[Dict[str, str]],
+        timings: StageTimings,
+        start: float,
+        connect: "asyncio.Future[None]",
+        **llm_kwargs,
+    ) -> AsyncIterator[str]:
+        generate_start = time.perf_counter()
+        await connect
+        first = True
+        async for chunk in self.llm.astream(messages, **llm_kwargs):
+            if first:
+                timings["time_to_first_token"] = time.perf_counter() - start
+                first = False
+            yield chunk
+        timings["generate"] = time.perf_counter() - generate_start
+        timings["total"] = time.perf_counter() - start
+
+    async def arun_pipeline(self, user_query: str, k: Optional[int] = None, **llm_kwargs) -> Dict[str, Any]:
+        """
+        Answers one query, streaming the response.
+
+        Retrieval and prompt assembly finish before this returns; `response` is
+        an async iterator of answer chunks. `timings` holds seconds per stage
+        (`embed_query`, `search`, `prompt`) and, once the stream has been
+        consumed, `time_to_first_token` (from the start of the call),
+        `generate` and `total`. The vector search runs in a worker thread so
+        concurrent pipelines keep streaming while one scores a large matrix.
+
+        Each stage needs the previous one's output, but the chat client's
+        connection does not: it is opened (`ChatOpenAI.aconnect`) while the
+        query is embedded and searched, so generation starts on a warm
+        connection.
+
+        :return: Dict with `response`, `context`, `messages` and `timings`
+        """
+        k = k if k is not None else self.k
+        timings = StageTimings()
+        start = time.perf_counter()
+        connect = asyncio.ensure_future(self.llm.aconnect())
+
+        with timings.stage("embed_query"):
+            query_vector = await self.vector_db_retriever.embedding_model.async_get_embedding(user_query)
+        with timings.stage("search"):
+            context_list = await asyncio.to_thread(
+                self.vector_db_retriever.search, np.asarray(query_vector), k
+            )
+        with timings.stage("prompt"):
+            messages = self.build_messages(user_query, context_list)
+
+        return {
+            "response": self._stream(messages, timings, start, connect, **llm_kwargs),
+            "context": context_list,
+            "messages": messages,
+            "timings": timings,
+        }
+
+    async def arun_many(
+        self,
+        user_queries: List[str],
+        k: Optional[int] = None,
+        max_concurrency: int = 8,
+        **batch_kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Answers many queries, e.g. for an evaluation sweep.
+
+        All queries are embedded in one batched request and scored together
+        with `search_many`; the completions then run concurrently through
+        `ChatOpenAI.abatch` (pass `rpm`/`tpm` to stay inside rate limits).
+
+        :return: Dict with per-query `responses`, `contexts` and batch-level `timings`
+        """
+        k = k if k is not None else self.k
+        timings = StageTimings()
+
+        with timings.stage("total"):
+            with timings.stage("embed_query"):
+                query_vectors = await self.vector_db_retriever.embedding_model.async_get_embeddings(user_queries)
+            with timings.stage("search"):
+                contexts = await asyncio.to_thread(self.vector_db_retriever.search_many, query_vectors, k)
+            with timings.stage("prompt"):
+                message_lists = [
+                    self.build_messages(user_query, context_list)
+                    for user_query, context_list in zip(user_queries, contexts)
+                ]
+            with timings.stage("generate"):
+                responses = await self.llm.abatch(
+                    message_lists, max_concurrency=max_concurrency, **batch_kwargs
+                )
+
+        return {"responses": responses, "contexts": contexts, "timings": timings}
+
+
+if __name__ == "__main__":
+    list_of_text = [
+        "I like to eat broccoli and bananas.",
+        "I ate a banana and spinach smoothie for breakfast.",
+        "Chinchillas and kittens are cute.",
+        "My sister adopted a kitten yesterday.",
+        "Look at this cute hamster munching on a piece of broccoli.",
+    ]
+
+    async def main():
+        vector_db = await VectorDatabase(storage="matrix").abuild_from_list(list_of_text)
+        pipeline = RetrievalAugmentedQAPipeline(ChatOpenAI(), vector_db, k=2)
+
+        result = await pipeline.arun_pipeline("What did I have for breakfast?")
+        async for chunk in result["response"]:
+            print(chunk, end="", flush=True)
+        print()
+        print({stage: f"{seconds * 1000:.0f} ms" for stage, seconds in result["timings"].items()})
+
+    asyncio.run(main())
@@ -1,8 +1,131 @@
+import mmap
 import os
-from typing import List
+import re
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
 import PyPDF2
 
 
+class Document:
+    __slots__ = ("text", "metadata")
+
+    def __init__(self, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        A piece of text plus where it came from.
+
+        :param text: The document (or page, or chunk) text
+        :param metadata: Provenance such as {"source": path, "page": 3}
+        """
+        self.text = text
+        self.metadata = metadata or {}
+
+    def __repr__(self) -> str:
+        return f"Document(text={self.text[:40]!r}..., metadata={self.metadata!r})"
+
+
+class Chunk:
+    __slots__ = ("doc_id", "start", "end")
+
+    def __init__(self, doc_id: Hashable, start: int, end: int):
+        """
+        A chunk as a [start, end) span of a document in a `ChunkCorpus`.
+
+        Holds no text, so millions of chunks cost a few dozen bytes each, and the
+        span doubles as exact provenance. Offsets are characters for in-memory
+        texts and bytes for memory-mapped files.
+        """
+        self.doc_id = doc_id
+        self.start = start
+        self.end = end
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Chunk) and (self.doc_id, self.start, self.end) == (
+            other.doc_id, other.start, other.end
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.doc_id, self.start, self.end))
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f"Chunk(doc_id={self.doc_id!r}, start={self.start}, end={self.end})"
+
+
+class ChunkCorpus:
+    def __init__(self, encoding: str = "utf-8"):
+        """
+        Owns the texts that `Chunk` records point into.
+
+        :param encoding: Encoding used to decode memory-mapped files
+        """
+        self.encoding = encoding
+        self._sources: Dict[Hashable, Union[str, mmap.mmap]] = {}
+
+    def add_text(self, doc_id: Hashable, text: str) -> Hashable:
+        self._sources[doc_id] = text
+        return doc_id
+
+    def add_file(self, file_path: str, doc_id: Optional[Hashable] = None) -> Hashable:
+        """Memory-maps a text file; its chunks are byte spans decoded on demand."""
+        doc_id = file_path if doc_id is None else doc_id
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                self._sources[doc_id] = ""
+            else:
+                self._sources[doc_id] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return doc_id
+
+    def source(self, doc_id: Hashable) -> Union[str, mmap.mmap]:
+        return self._sources[doc_id]
+
+    def doc_ids(self) -> List[Hashable]:
+        return list(self._sources)
+
+    def text(self, chunk: Chunk) -> str:
+        """Materializes the text of one chunk."""
+        span = self._sources[chunk.doc_id][chunk.start : chunk.end]
+        return span.decode(self.encoding) if isinstance(span, bytes) else span
+
+    def texts(self, chunks: Iterable[Chunk]) -> List[str]:
+        return [self.text(chunk) for chunk in chunks]
+
+    def close(self) -> None:
+        for source in self._sources.values():
+            if isinstance(source, mmap.mmap):
+                source.close()
+        self._sources.clear()
+
+
+def _next_char_start(data: mmap.mmap, position: int) -> int:
+    """Moves a byte offset forward past UTF-8 continuation bytes."""
+    while position < len(data) and data[position] & 0xC0 == 0x80:
+        position += 1
+    return position
+
+
+def _extract_pdf_pages(file_path: str, start: int = 0, end: Optional[int] = None) -> str:
+    """Extracts the text of pages [start, end) of a PDF, one line break after each page."""
+    with open(file_path, "rb") as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        n_pages = len(pdf_reader.pages)
+        end = n_pages if end is None else min(end, n_pages)
+        return "".join(pdf_reader.pages[i].extract_text() + "\n" for i in range(start, end))
+
+
+def _extract_pdf_text(file_path: str) -> str:
+    """Extracts the text of every page of a PDF, one line break after each page."""
+    return _extract_pdf_pages(file_path)
+
+
+def _count_pdf_pages(file_path: str) -> int:
+    with open(file_path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
 class TextFileLoader:
     def __init__(self, path: str, encoding: str = "utf-8"):
         self.documents = []
@@ -24,13 +147,39 @@ class TextFileLoader:
             self.documents.append(f.read())
 
     def load_directory(self):
-        for root, _, files in os.walk(self.path):
-            for file in files:
-                if file.endswith(".txt"):
-                    with open(
-                        os.path.join(root, file), "r", encoding=self.encoding
-                    ) as f:
-                        self.documents.append(f.read())
+        self.documents.extend(self._iter_directory())
+
+    def _iter_directory(self) -> Iterator[str]:
+        yield from self.iter_files(self.file_paths())
+
+    def file_paths(self) -> List[str]:
+        """Returns the .txt files this loader reads, in load order."""
+        if os.path.isfile(self.path):
+            return [self.path]
+        return [
+            os.path.join(root, file)
+            for root, _, files in os.walk(self.path)
+            for file in files
+            if file.endswith(".txt")
+        ]
+
+    def iter_files(self, file_paths: List[str]) -> Iterator[str]:
+        """Yields the contents of the given files, in order."""
+        for file_path in file_paths:
+            with open(file_path, "r", encoding=self.encoding) as f:
+                yield f.read()
+
+    def iter_documents(self) -> Iterator[str]:
+        """Yields documents one at a time without keeping them in `self.documents`."""
+        if os.path.isdir(self.path):
+            yield from self._iter_directory()
+        elif os.path.isfile(self.path) and self.path.endswith(".txt"):
+            with open(self.path, "r", encoding=self.encoding) as f:
+                yield f.read()
+        else:
+            raise ValueError(
+                "Provided path is neither a valid directory nor a .txt file."
+            )
 
     def load_documents(self):
         self.load()
@@ -56,17 +205,187 @@ class CharacterTextSplitter:
             chunks.append(text[i : i + self.chunk_size])
         return chunks
 
+    def split_spans(self, text: Union[str, mmap.mmap]) -> List[Tuple[int, int]]:
+        """
+        Returns the [start, end) offsets `split` would slice, without copying.
+
+        For a memory-mapped file the offsets are bytes, nudged forward so no
+        span starts or ends inside a multi-byte UTF-8 character.
+        """
+        spans = []
+        for i in range(0, len(text), self.chunk_size - self.chunk_overlap):
+            start, end = i, min(i + self.chunk_size, len(text))
+            if isinstance(text, mmap.mmap):
+                start, end = _next_char_start(text, start), _next_char_start(text, end)
+            if start < end:
+                spans.append((start, end))
+        return spans
+
+    def split_records(self, corpus: ChunkCorpus, doc_ids: Optional[Iterable[Hashable]] = None) -> Iterator[Chunk]:
+        """Lazily yields offset-only `Chunk` records for documents in `corpus`."""
+        for doc_id in corpus.doc_ids() if doc_ids is None else doc_ids:
+            for start, end in self.split_spans(corpus.source(doc_id)):
+                yield Chunk(doc_id, start, end)
+
     def split_texts(self, texts: List[str]) -> List[str]:
         chunks = []
         for text in texts:
             chunks.extend(self.split(text))
         return chunks
 
+    def iter_split_texts(self, texts: Iterable[str]) -> Iterator[str]:
+        """Lazily splits a (possibly lazy) stream of texts, one chunk at a time."""
+        for text in texts:
+            yield from self.split(text)
+
+    def iter_split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Lazily splits documents; each chunk keeps its parent's metadata."""
+        for document in documents:
+            for chunk in self.split(document.text):
+                yield Document(chunk, dict(document.metadata))
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = "cl100k_base"):
+    """Returns a process-wide cached tiktoken encoding."""
+    import tiktoken
+
+    return tiktoken.get_encoding(encoding_name)
+
+
+# Preferred cut points, strongest first; each match ends where a chunk may end.
+# Cuts fall *before* the whitespace: tiktoken tokens carry their leading space,
+# so the following token (" Second") then starts exactly at the cut.
+_BOUNDARY_PATTERNS = [
+    re.compile(r"(?<=\S)(?=[ \t]*\n[ \t]*\n)"),  # paragraph
+    re.compile(r"[.!?][\"')\]]*(?=\s)|(?<=\S)(?=[ \t]*\n)"),  # sentence or line
+    re.compile(r"(?<=\S)(?=\s)"),  # word
+]
+
+
+class TokenTextSplitter(CharacterTextSplitter):
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32,
+        encoding_name: str = "cl100k_base",
+        encoding=None,
+        min_chunk_fraction: float = 0.5,
+    ):
+        """
+        Splits text into chunks of at most `chunk_size` tokens, cutting at a
+        paragraph break if possible, else a sentence end, else between words.
+
+        The text is tokenized once; chunk boundaries are found by binary search
+        over precomputed token offsets and boundary positions, so splitting is
+        linear in the text length. Each chunk is re-tokenized once to confirm
+        it fits, since a span can tokenize differently on its own.
+
+        :param chunk_size: Maximum tokens per chunk
+        :param chunk_overlap: Tokens repeated at the start of the next chunk
+        :param encoding_name: tiktoken encoding to count tokens with
+        :param encoding: An already constructed encoding (overrides `encoding_name`)
+        :param min_chunk_fraction: A boundary is only used if the chunk keeps at
+            least this fraction of `chunk_size`; otherwise a weaker boundary is tried
+        """
+        super().__init__(chunk_size, chunk_overlap)
+        self.encoding_name = encoding_name
+        self._encoding = encoding
+        self.min_chunk_fraction = min_chunk_fraction
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            self._encoding = get_encoding(self.encoding_name)
+        return self._encoding
+
+    def split(self, text: str) -> List[str]:
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Character spans of the chunks, with surrounding whitespace excluded."""
+        if not isinstance(text, str):
+            raise TypeError("TokenTextSplitter needs in-memory text, not a memory-mapped file")
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if not tokens:
+            return []
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        n_tokens = len(tokens)
+        boundaries = [
+            [match.end() for match in pattern.finditer(text)]
+            for pattern in _BOUNDARY_PATTERNS
+        ]
+
+        def char_at(token_index: int) -> int:
+            return offsets[token_index] if token_index < n_tokens else len(text)
+
+        def strip(span_start: int, span_end: int) -> Tuple[int, int]:
+            while span_start < span_end and text[span_start].isspace():
+                span_start += 1
+            while span_end > span_start and text[span_end - 1].isspace():
+                span_end -= 1
+            return span_start, span_end
+
+        spans = []
+        start = 0
+        while start < n_tokens:
+            end = min(start + self.chunk_size, n_tokens)
+            if end < n_tokens:
+                start_char, limit_char = char_at(start), char_at(end)
+                min_char = char_at(start + int(self.chunk_size * self.min_chunk_fraction))
+                for positions in boundaries:
+                    i = bisect_right(positions, limit_char) - 1
+                    if i >= 0 and positions[i] > start_char and positions[i] >= min_char:
+                        # The token starting at (or straddling) the cut opens the next chunk
+                        end = bisect_right(offsets, positions[i]) - 1
+                        if end > start:
+                            break
+                        end = min(start + self.chunk_size, n_tokens)
+            span_start, span_end = strip(char_at(start), char_at(end))
+            # Stripping whitespace and cutting at a boundary can change how the
+            # span tokenizes on its own; pull the end back until it fits
+            excess = len(self.encoding.encode(text[span_start:span_end], disallowed_special=())) - self.chunk_size
+            while excess > 0 and end > start + 1:
+                words = boundaries[-1]
+                i = bisect_left(words, span_end) - 1
+                new_end = bisect_right(offsets, words[i]) - 1 if i >= 0 and words[i] > span_start else start
+                end = new_end if start < new_end < end else max(end - excess, start + 1)
+                span_start, span_end = strip(char_at(start), char_at(end))
+                excess = len(self.encoding.encode(text[span_start:span_end], disallowed_special=())) - self.chunk_size
+            if excess > 0:
+                # Down to one token that only outgrows chunk_size once stripped
+                # (e.g. " laundering" is one token, "laundering" four): keep it whole
+                span_start, span_end = char_at(start), char_at(end)
+            if span_start < span_end:
+                spans.append((span_start, span_end))
+            if end >= n_tokens:
+                break
+            next_start = max(end - self.chunk_overlap, start + 1)
+            if next_start < end:
+                # Begin the overlap at the token that opens a word rather than mid-word
+                words = boundaries[-1]
+                i = bisect_left(words, char_at(next_start))
+                if i < len(words) and words[i] < char_at(end):
+                    next_start = max(bisect_right(offsets, words[i]) - 1, start + 1)
+                else:
+                    # No word starts inside the overlap; skip it rather than cut a word
+                    next_start = end
+            start = next_start
+        return spans
+
 
 class PDFLoader:
-    def __init__(self, path: str):
+    def __init__(self, path: str, max_workers: int = 1, pages_per_task: Optional[int] = None):
+        """
+        :param path: A PDF file or a directory searched recursively for PDFs
+        :param max_workers: Number of processes extracting text; 1 extracts serially
+        :param pages_per_task: With max_workers > 1, split each PDF into page ranges
+            of this size so one large file is also spread across processes
+        """
         self.documents = []
         self.path = path
+        self.max_workers = max_workers
+        self.pages_per_task = pages_per_task
         print(f"PDFLoader initialized with path: {self.path}")
 
     def load(self):
@@ -76,6 +395,10 @@ class PDFLoader:
         print(f"Is directory: {os.path.isdir(self.path)}")
         print(f"File permissions: {oct(os.stat(self.path).st_mode)[-3:]}")
         
+        if os.path.isdir(self.path):
+            self.load_directory()
+            return
+
         try:
             # Try to open the file first to verify access
             with open(self.path, 'rb') as test_file:
@@ -90,31 +413,83 @@ class PDFLoader:
             raise ValueError(f"Error processing file at '{self.path}': {str(e)}")
 
     def load_file(self):
-        with open(self.path, 'rb') as file:
-            # Create PDF reader object
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            # Extract text from each page
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            self.documents.append(text)
+        self.documents.append(_extract_pdf_text(self.path))
 
     def load_directory(self):
-        for root, _, files in os.walk(self.path):
-            for file in files:
-                if file.lower().endswith('.pdf'):
-                    file_path = os.path.join(root, file)
-                    with open(file_path, 'rb') as f:
-                        pdf_reader = PyPDF2.PdfReader(f)
-                        
-                        # Extract text from each page
-                        text = ""
-                        for page in pdf_reader.pages:
-                            text += page.extract_text() + "\n"
-                        
-                        self.documents.append(text)
+        self.documents.extend(self._iter_directory())
+
+    def _pdf_paths(self) -> List[str]:
+        return [
+            os.path.join(root, file)
+            for root, _, files in os.walk(self.path)
+            for file in files
+            if file.lower().endswith('.pdf')
+        ]
+
+    def _iter_directory(self) -> Iterator[str]:
+        yield from self._iter_pdfs(self._pdf_paths())
+
+    def file_paths(self) -> List[str]:
+        """Returns the PDF files this loader reads, in load order."""
+        return self._pdf_paths() if os.path.isdir(self.path) else [self.path]
+
+    def iter_files(self, file_paths: List[str]) -> Iterator[str]:
+        """Yields the text of the given PDFs, in order (in parallel if configured)."""
+        yield from self._iter_pdfs(file_paths)
+
+    def _iter_pdfs(self, file_paths: List[str]) -> Iterator[str]:
+        """Yields the text of each PDF in `file_paths` order, in parallel if configured."""
+        if self.max_workers <= 1 or not file_paths:
+            for file_path in file_paths:
+                yield _extract_pdf_text(file_path)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            if self.pages_per_task:
+                page_counts = pool.map(_count_pdf_pages, file_paths)
+                tasks = [
+                    (file_path, start, start + self.pages_per_task)
+                    for file_path, n_pages in zip(file_paths, page_counts)
+                    for start in range(0, max(n_pages, 1), self.pages_per_task)
+                ]
+            else:
+                tasks = [(file_path, 0, None) for file_path in file_paths]
+
+            # pool.map yields in submission order, so consecutive results of one
+            # file are its page ranges in order
+            parts, current = [], None
+            for (file_path, _, _), text in zip(tasks, pool.map(_extract_pdf_pages, *zip(*tasks))):
+                if file_path != current and current is not None:
+                    yield "".join(parts)
+                    parts = []
+                current = file_path
+                parts.append(text)
+            yield "".join(parts)
+
+    def iter_documents(self) -> Iterator[str]:
+        """Yields one document per PDF without keeping them in `self.documents`."""
+        if os.path.isdir(self.path):
+            yield from self._iter_directory()
+        else:
+            yield from self._iter_pdfs([self.path])
+
+    def iter_pages(self) -> Iterator[Document]:
+        """
+        Lazily yields one `Document` per page, as soon as that page is extracted.
+
+        Metadata holds the `source` path, the 1-based `page` number and the
+        PDF's `total_pages`, so chunks and citations can point at pages.
+        """
+        file_paths = self._pdf_paths() if os.path.isdir(self.path) else [self.path]
+        for file_path in file_paths:
+            with open(file_path, "rb") as f:
+                pdf_reader = PyPDF2.PdfReader(f)
+                total_pages = len(pdf_reader.pages)
+                for i in range(total_pages):
+                    yield Document(
+                        pdf_reader.pages[i].extract_text(),
+                        {"source": file_path, "page": i + 1, "total_pages": total_pages},
+                    )
 
     def load_documents(self):
         self.load()
@@ -1,10 +1,23 @@
+import json
+import os
 import numpy as np
 from collections import defaultdict
-from typing import List, Tuple, Callable
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Callable
 from aimakerspace.openai_utils.embedding import EmbeddingModel
+from aimakerspace.ann import IVFIndex
+from aimakerspace.bm25 import BM25Index
+from aimakerspace.fileio import save_array, save_json
+from aimakerspace.metadata import MetadataStore
+from aimakerspace.text_utils import Chunk, ChunkCorpus, Document
 import asyncio
 
 
+STORAGE_MODES = ("dict", "matrix")
+# Upper bound on the (queries x rows) score block materialized at once by search_many.
+MAX_SCORE_BLOCK = 2**26
+SAVE_FORMAT_VERSION = 1
+
+
 def cosine_similarity(vector_a: np.array, vector_b: np.array) -> float:
     """Computes the cosine similarity between two vectors."""
     dot_product = np.dot(vector_a, vector_b)
@@ -13,44 +26,634 @@ def cosine_similarity(vector_a: np.array, vector_b: np.array) -> float:
     return dot_product / (norm_a * norm_b)
 
 
+def reciprocal_rank_fusion(
+    rankings: List[List[Tuple[str, float]]],
+    k: int,
+    rrf_k: int = 60,
+    weights: Optional[List[float]] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Fuses ranked result lists by summing `weight / (rrf_k + rank)` per key.
+
+    Only ranks are used, so rankings with incomparable scores (cosine vs BM25)
+    can be combined without normalization.
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking, weight in zip(rankings, weights):
+        for rank, (key, _) in enumerate(ranking, 1):
+            fused[key] += weight / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)[:k]
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Returns the indices of the k highest scores, best first.
+
+    Uses argpartition so only the selected k entries are fully sorted.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _top_k_indices_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise version of `_top_k_indices` for a (queries, rows) score block."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
 class VectorDatabase:
-    def __init__(self, embedding_model: EmbeddingModel = None):
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel = None,
+        storage: str = "dict",
+        keyword_index: bool = False,
+    ):
+        """
+        :param embedding_model: Model used to embed texts and queries
+        :param storage: "dict" keeps one array per key in `self.vectors`;
+            "matrix" keeps every vector as a pre-normalized float32 row of a
+            single contiguous matrix so cosine search is one matrix-vector product
+        :param keyword_index: Maintain a BM25 index over the chunk texts as
+            vectors are inserted, enabling `keyword_search` and `hybrid_search`
+            (requires storage="matrix")
+        """
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Invalid storage: {storage}. Must be one of {STORAGE_MODES}")
+        if keyword_index and storage != "matrix":
+            raise ValueError("A keyword index requires storage='matrix'")
+        self.storage = storage
         self.vectors = defaultdict(np.array)
         self.embedding_model = embedding_model or EmbeddingModel()
+        self._keys: List[str] = []
+        self._key_to_row: Dict[str, int] = {}
+        self._row_buffer = np.empty((0, 0), dtype=np.float32)
+        self._norm_buffer = np.empty(0, dtype=np.float32)
+        self.index: Optional[IVFIndex] = None
+        self.keyword_index: Optional[BM25Index] = BM25Index() if keyword_index else None
+        self.metadata = MetadataStore()
+
+    def __len__(self) -> int:
+        return len(self._keys) if self.storage == "matrix" else len(self.vectors)
+
+    def __contains__(self, key: str) -> bool:
+        return key in (self._key_to_row if self.storage == "matrix" else self.vectors)
+
+    def insert(self, key: str, vector: np.array, metadata: Optional[Dict[str, Any]] = None) -> None:
+        if self.storage == "matrix":
+            self._insert_rows(
+                [key], np.asarray(vector)[np.newaxis, :], metadata=None if metadata is None else [metadata]
+            )
+        else:
+            if metadata is not None:
+                raise ValueError("Metadata requires storage='matrix'")
+            self.vectors[key] = vector
+
+    def insert_many(
+        self,
+        keys: List[str],
+        vectors: List[np.array],
+        texts: Optional[List[str]] = None,
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Inserts a batch of vectors; in matrix storage this is one bulk append.
+
+        :param texts: Texts for the keyword index; defaults to the keys, so
+            only needed for `Chunk` keys
+        :param metadata: One metadata dict per key (matrix storage only); it
+            replaces any metadata an existing key had. Without it, existing
+            keys keep theirs and new keys have none.
+        """
+        if self.storage == "matrix":
+            if len(keys):
+                self._insert_rows(keys, np.asarray(vectors), texts, metadata)
+            return
+        if metadata is not None:
+            raise ValueError("Metadata requires storage='matrix'")
+        for key, vector in zip(keys, vectors):
+            self.insert(key, np.array(vector))
+
+    @property
+    def _matrix(self) -> np.ndarray:
+        """The (n, dim) matrix of unit-length rows, aligned with `self._keys`."""
+        return self._row_buffer[: len(self._keys)]
+
+    @property
+    def _norms(self) -> np.ndarray:
+        """Original vector norms, kept so raw vectors can be reconstructed."""
+        return self._norm_buffer[: len(self._keys)]
+
+    def _reserve(self, n_rows: int, dim: int) -> None:
+        """Grows the row buffers geometrically so appends stay amortized O(1)."""
+        capacity = self._row_buffer.shape[0]
+        writeable = self._row_buffer.flags.writeable and self._norm_buffer.flags.writeable
+        if n_rows <= capacity and dim == self._row_buffer.shape[1] and writeable:
+            return
+        new_capacity = max(n_rows, 2 * capacity, 16)
+        row_buffer = np.empty((new_capacity, dim), dtype=np.float32)
+        norm_buffer = np.empty(new_capacity, dtype=np.float32)
+        if self._keys:
+            row_buffer[: len(self._keys)] = self._matrix
+            norm_buffer[: len(self._keys)] = self._norms
+        self._row_buffer, self._norm_buffer = row_buffer, norm_buffer
+
+    def _insert_rows(
+        self,
+        keys: List[str],
+        vectors: np.ndarray,
+        texts: Optional[List[str]] = None,
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Appends (or overwrites) normalized rows in the matrix store."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1)
+        rows = vectors / np.where(norms == 0, 1.0, norms)[:, np.newaxis]
+
+        if self._keys and rows.shape[1] != self._row_buffer.shape[1]:
+            raise ValueError(
+                f"Vector dimension {rows.shape[1]} does not match database dimension {self._row_buffer.shape[1]}"
+            )
+        self._reserve(len(self._keys) + len(keys), rows.shape[1])
+
+        n_existing = len(self._keys)
+        row_ids = []
+        for key, row, norm in zip(keys, rows, norms):
+            index = self._key_to_row.get(key)
+            if index is None:
+                index = len(self._keys)
+                self._key_to_row[key] = index
+                self._keys.append(key)
+            self._row_buffer[index] = row
+            self._norm_buffer[index] = norm
+            row_ids.append(index)
+
+        if self.index is not None and row_ids:
+            touched = np.fromiter(dict.fromkeys(row_ids), dtype=np.int64)
+            overwritten = touched[touched < n_existing]
+            if len(overwritten):
+                # Overwritten rows leave the list of their old vector's centroid and are re-filed
+                new_row_ids = np.arange(n_existing)
+                new_row_ids[overwritten] = -1
+                self.index.remap(new_row_ids)
+            self.index.add(touched, self._row_buffer[touched])
+        if self.keyword_index is not None:
+            self._index_texts(keys, row_ids, texts)
+        self.metadata.resize(len(self._keys))
+        if metadata is not None:
+            # A key repeated within the batch keeps its last metadata, like its vector
+            by_row = dict(zip(row_ids, metadata))
+            self.metadata.set(list(by_row), list(by_row.values()))
 
-    def insert(self, key: str, vector: np.array) -> None:
-        self.vectors[key] = vector
+    def _index_texts(self, keys: List[str], row_ids: List[int], texts: Optional[List[str]]) -> None:
+        if texts is None:
+            if any(not isinstance(key, str) for key in keys):
+                raise ValueError("texts are required to keyword-index non-string keys")
+            texts = keys
+        # A key repeated within the batch keeps its last text, like its vector
+        by_row = dict(zip(row_ids, texts))
+        self.keyword_index.add(list(by_row), list(by_row.values()))
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Removes vectors by key; unknown keys are ignored.
+
+        In matrix storage the remaining rows are compacted in place (keeping
+        their relative order) and an ANN index is renumbered to match.
+
+        :return: Number of vectors removed
+        """
+        if self.storage != "matrix":
+            removed = [key for key in set(keys) if key in self.vectors]
+            for key in removed:
+                del self.vectors[key]
+            return len(removed)
+
+        rows = sorted({self._key_to_row[key] for key in keys if key in self._key_to_row})
+        if not rows:
+            return 0
+        keep = np.ones(len(self._keys), dtype=bool)
+        keep[rows] = False
+        new_row_ids = np.where(keep, np.cumsum(keep) - 1, -1)
+
+        n_keep = int(keep.sum())
+        self._reserve(len(self._keys), self._row_buffer.shape[1])
+        self._row_buffer[:n_keep] = self._matrix[keep]
+        self._norm_buffer[:n_keep] = self._norms[keep]
+        self._keys = [key for key, kept in zip(self._keys, keep) if kept]
+        self._key_to_row = {key: row for row, key in enumerate(self._keys)}
+        if self.index is not None:
+            self.index.remap(new_row_ids)
+        if self.keyword_index is not None:
+            self.keyword_index.remap(new_row_ids)
+        self.metadata.take(keep)
+        return len(rows)
+
+    def build_index(self, n_lists: Optional[int] = None, n_probe: int = 8, **index_kwargs) -> "VectorDatabase":
+        """
+        Builds an approximate IVF index that `search` uses from then on.
+
+        Rows inserted afterwards are filed into the existing lists; rebuild after
+        large inserts so the centroids keep reflecting the data.
+
+        :param n_lists: Number of k-means lists (defaults to sqrt of the row count)
+        :param n_probe: Number of lists scanned per query
+        :param index_kwargs: Extra arguments for `IVFIndex`
+        """
+        if self.storage != "matrix":
+            raise ValueError("An ANN index requires storage='matrix'")
+        self.index = IVFIndex(n_lists=n_lists, n_probe=n_probe, **index_kwargs).build(self._matrix)
+        return self
+
+    def drop_index(self) -> None:
+        """Removes the ANN index so `search` is exact again."""
+        self.index = None
+
+    def build_keyword_index(self, texts: Optional[List[str]] = None, **bm25_kwargs) -> "VectorDatabase":
+        """
+        (Re)builds the BM25 index over every stored row, e.g. after `load` of a
+        database saved without one.
+
+        :param texts: One text per row in insertion order; defaults to the keys
+        :param bm25_kwargs: Extra arguments for `BM25Index`
+        """
+        if self.storage != "matrix":
+            raise ValueError("A keyword index requires storage='matrix'")
+        self.keyword_index = BM25Index(**bm25_kwargs)
+        if self._keys:
+            self._index_texts(self._keys, list(range(len(self._keys))), texts)
+        return self
+
+    def keys(self) -> Iterable[Hashable]:
+        """Iterates over the keys regardless of storage mode."""
+        return iter(self._keys if self.storage == "matrix" else self.vectors)
+
+    def items(self):
+        """Iterates over (key, vector) pairs regardless of storage mode."""
+        if self.storage == "matrix":
+            for key in self._keys:
+                yield key, self.retrieve_from_key(key)
+        else:
+            yield from self.vectors.items()
 
     def search(
         self,
         query_vector: np.array,
         k: int,
         distance_measure: Callable = cosine_similarity,
+        exact: bool = False,
+        n_probe: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None,
     ) -> List[Tuple[str, float]]:
+        """
+        Returns the k keys most similar to `query_vector`.
+
+        :param exact: Bypass the ANN index (if built) and scan every vector
+        :param n_probe: Overrides the ANN index's `n_probe` for this query
+        :param filter: Metadata filter (see `MetadataStore.mask`); only
+            matching rows are scored (matrix storage only)
+        """
+        mask = self._filter_mask(filter)
+        if self.storage == "matrix" and distance_measure is cosine_similarity:
+            return self._matrix_search(query_vector, k, exact, n_probe, mask)
+
+        if mask is not None:
+            scores = [
+                (self._keys[i], distance_measure(query_vector, self.retrieve_from_key(self._keys[i])))
+                for i in np.flatnonzero(mask)
+            ]
+            return sorted(scores, key=lambda x: x[1], reverse=True)[:k]
+
         scores = [
             (key, distance_measure(query_vector, vector))
-            for key, vector in self.vectors.items()
+            for key, vector in self.items()
         ]
         return sorted(scores, key=lambda x: x[1], reverse=True)[:k]
 
+    def _matrix_search(
+        self,
+        query_vector: np.array,
+        k: int,
+        exact: bool = False,
+        n_probe: Optional[int] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Cosine search as a single matrix-vector product plus top-k selection.
+
+        With a row `mask`, only the selected rows are scored. A selective mask
+        is scanned exactly (fewer rows than the ANN index would probe);
+        otherwise the index skips masked rows within the probed lists.
+        """
+        if not self._keys:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm > 0:
+            query = query / query_norm
+
+        rows = None if mask is None else np.flatnonzero(mask)
+        if self.index is not None and not exact:
+            probed = len(self._keys) * min(n_probe or self.index.n_probe, self.index.n_lists) / self.index.n_lists
+            if rows is None or len(rows) > probed:
+                row_ids, scores = self.index.search(self._matrix, query, k, n_probe, mask)
+                return [(self._keys[i], float(score)) for i, score in zip(row_ids, scores)]
+
+        if rows is None:
+            scores = self._matrix @ query
+            return [(self._keys[i], float(scores[i])) for i in _top_k_indices(scores, k)]
+        scores = self._matrix[rows] @ query
+        return [(self._keys[rows[i]], float(scores[i])) for i in _top_k_indices(scores, k)]
+
+    def _filter_mask(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if filter is None:
+            return None
+        if self.storage != "matrix":
+            raise ValueError("Metadata filters require storage='matrix'")
+        return self.metadata.mask(filter)
+
+    def get_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the metadata stored for `key` (None if the key is unknown)."""
+        row = self._key_to_row.get(key)
+        return None if row is None else self.metadata.get(row)
+
+    def search_many(
+        self,
+        query_vectors: List[np.array],
+        k: int,
+        distance_measure: Callable = cosine_similarity,
+        exact: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Searches several query vectors at once.
+
+        In matrix storage with cosine similarity the queries are scored together
+        as one matrix-matrix product (in blocks of at most MAX_SCORE_BLOCK scores).
+        With an ANN index built (and `exact` False) each query probes the index.
+        A metadata `filter` is evaluated once and restricts every query.
+
+        :return: One top-k result list per query, in query order
+        """
+        if not (self.storage == "matrix" and distance_measure is cosine_similarity) or (
+            self.index is not None and not exact
+        ):
+            return [self.search(query, k, distance_measure, filter=filter) for query in query_vectors]
+        if len(query_vectors) == 0:
+            return []
+        if not self._keys:
+            return [[] for _ in query_vectors]
+
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1.0, norms)
+
+        mask = self._filter_mask(filter)
+        rows = np.arange(len(self._keys)) if mask is None else np.flatnonzero(mask)
+        if len(rows) == 0:
+            return [[] for _ in query_vectors]
+        matrix = self._matrix if mask is None else self._matrix[rows]
+        block = max(1, MAX_SCORE_BLOCK // len(rows))
+        results = []
+        for start in range(0, len(queries), block):
+            scores = queries[start : start + block] @ matrix.T
+            top = _top_k_indices_rows(scores, k)
+            for row_scores, row_top in zip(scores, top):
+                results.append([(self._keys[rows[i]], float(row_scores[i])) for i in row_top])
+        return results
+
+    async def asearch_many_by_text(
+        self,
+        query_texts: List[str],
+        k: int,
+        distance_measure: Callable = cosine_similarity,
+        return_as_text: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """Embeds all queries in one batched request, then runs `search_many`."""
+        query_vectors = await self.embedding_model.async_get_embeddings(query_texts)
+        results = self.search_many(query_vectors, k, distance_measure, filter=filter)
+        if return_as_text:
+            return [[result[0] for result in query_results] for query_results in results]
+        return results
+
+    def keyword_search(
+        self, query_text: str, k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """Returns up to k keys ranked by BM25 score for `query_text`."""
+        if self.keyword_index is None:
+            raise ValueError("No keyword index; pass keyword_index=True or call build_keyword_index")
+        row_ids, scores = self.keyword_index.search(query_text, k, self._filter_mask(filter))
+        return [(self._keys[i], float(score)) for i, score in zip(row_ids, scores)]
+
+    def _fuse(
+        self,
+        query_text: str,
+        query_vector: np.array,
+        k: int,
+        n_candidates: Optional[int],
+        rrf_k: int,
+        weights: Tuple[float, float],
+        filter: Optional[Dict[str, Any]],
+    ) -> List[Tuple[str, float]]:
+        n_candidates = max(k, n_candidates or 4 * k)
+        dense = self.search(query_vector, n_candidates, filter=filter)
+        sparse = self.keyword_search(query_text, n_candidates, filter)
+        return reciprocal_rank_fusion([dense, sparse], k, rrf_k, list(weights))
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        k: int,
+        n_candidates: Optional[int] = None,
+        rrf_k: int = 60,
+        weights: Tuple[float, float] = (1.0, 1.0),
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Combines dense cosine search with BM25 keyword search.
+
+        Each side returns its top `n_candidates` (default 4k) and the two
+        rankings are merged with reciprocal rank fusion, so exact identifiers
+        found by BM25 surface even when their embeddings are not close.
+
+        :param weights: (dense, keyword) weights in the fusion
+        :param filter: Metadata filter applied to both sides
+        :return: Up to k (key, fused score) pairs, best first
+        """
+        query_vector = self.embedding_model.get_embedding(query_text)
+        return self._fuse(query_text, query_vector, k, n_candidates, rrf_k, weights, filter)
+
+    async def ahybrid_search(
+        self,
+        query_text: str,
+        k: int,
+        n_candidates: Optional[int] = None,
+        rrf_k: int = 60,
+        weights: Tuple[float, float] = (1.0, 1.0),
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Async `hybrid_search`: awaits the query embedding instead of blocking."""
+        query_vector = await self.embedding_model.async_get_embedding(query_text)
+        return self._fuse(query_text, query_vector, k, n_candidates, rrf_k, weights, filter)
+
     def search_by_text(
         self,
         query_text: str,
         k: int,
         distance_measure: Callable = cosine_similarity,
         return_as_text: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
     ) -> List[Tuple[str, float]]:
         query_vector = self.embedding_model.get_embedding(query_text)
-        results = self.search(query_vector, k, distance_measure)
+        results = self.search(query_vector, k, distance_measure, filter=filter)
         return [result[0] for result in results] if return_as_text else results
 
     def retrieve_from_key(self, key: str) -> np.array:
+        if self.storage == "matrix":
+            index = self._key_to_row.get(key)
+            if index is None:
+                return None
+            return self._matrix[index] * self._norms[index]
         return self.vectors.get(key, None)
 
-    async def abuild_from_list(self, list_of_text: List[str]) -> "VectorDatabase":
+    def save(self, path: str) -> None:
+        """
+        Writes the database to the directory `path`.
+
+        The normalized matrix and norms are raw `.npy` files so `load` can
+        memory-map them; keys and format metadata go to small JSON files.
+        Every file is written to a temp file and renamed into place, so saving
+        back to the directory a memory-mapped database was loaded from is
+        safe. `meta.json` is written last: `load` checks the other files
+        against its count, so an interrupted save is detected.
+        """
+        if self.storage != "matrix":
+            raise ValueError("save requires storage='matrix'")
+        os.makedirs(path, exist_ok=True)
+        if self.index is not None:
+            self.index.save(os.path.join(path, "ivf"))
+        if self.keyword_index is not None:
+            self.keyword_index.save(os.path.join(path, "bm25"))
+        if self.metadata.columns:
+            self.metadata.save(os.path.join(path, "metadata"))
+        save_array(os.path.join(path, "vectors.npy"), self._matrix)
+        save_array(os.path.join(path, "norms.npy"), self._norms)
+        key_type = "chunk" if self._keys and isinstance(self._keys[0], Chunk) else "text"
+        keys = (
+            [[key.doc_id, key.start, key.end] for key in self._keys]
+            if key_type == "chunk"
+            else self._keys
+        )
+        save_json(os.path.join(path, "keys.json"), keys, ensure_ascii=False)
+        save_json(
+            os.path.join(path, "meta.json"),
+            {
+                "format_version": SAVE_FORMAT_VERSION,
+                "count": len(self._keys),
+                "dim": int(self._row_buffer.shape[1]),
+                "embeddings_model_name": getattr(
+                    self.embedding_model, "embeddings_model_name", None
+                ),
+                "has_index": self.index is not None,
+                "has_keyword_index": self.keyword_index is not None,
+                "has_metadata": bool(self.metadata.columns),
+                "key_type": key_type,
+            },
+        )
+
+    @classmethod
+    def load(
+        cls, path: str, embedding_model: EmbeddingModel = None, mmap: bool = True
+    ) -> "VectorDatabase":
+        """
+        Opens a database written by `save` in matrix storage.
+
+        With `mmap` the matrix is memory-mapped read-only, so worker processes
+        share one page-cached copy; the first insert copies it into memory.
+        """
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["format_version"] != SAVE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version: {meta['format_version']}")
+
+        vector_db = cls(embedding_model, storage="matrix")
+        mmap_mode = "r" if mmap else None
+        vector_db._row_buffer = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mmap_mode)
+        vector_db._norm_buffer = np.load(os.path.join(path, "norms.npy"), mmap_mode=mmap_mode)
+        with open(os.path.join(path, "keys.json"), encoding="utf-8") as f:
+            vector_db._keys = json.load(f)
+        if meta.get("key_type") == "chunk":
+            vector_db._keys = [Chunk(*key) for key in vector_db._keys]
+        if not meta["count"] == len(vector_db._keys) == len(vector_db._row_buffer):
+            raise ValueError(f"Incomplete save in {path}: files do not match meta.json")
+        vector_db._key_to_row = {key: row for row, key in enumerate(vector_db._keys)}
+        if meta.get("has_index"):
+            vector_db.index = IVFIndex.load(os.path.join(path, "ivf"), mmap=mmap)
+        if meta.get("has_keyword_index"):
+            vector_db.keyword_index = BM25Index.load(os.path.join(path, "bm25"), mmap=mmap)
+        if meta.get("has_metadata"):
+            vector_db.metadata = MetadataStore.load(os.path.join(path, "metadata"))
+        vector_db.metadata.resize(len(vector_db._keys))
+        return vector_db
+
+    async def abuild_from_list(
+        self, list_of_text: List[str], metadata: Optional[List[Dict[str, Any]]] = None
+    ) -> "VectorDatabase":
         embeddings = await self.embedding_model.async_get_embeddings(list_of_text)
-        for text, embedding in zip(list_of_text, embeddings):
-            self.insert(text, np.array(embedding))
+        self.insert_many(list_of_text, embeddings, metadata=metadata)
+        return self
+
+    async def abuild_from_documents(self, documents: List[Document]) -> "VectorDatabase":
+        """Embeds `Document` chunks keyed by their text, storing each one's metadata."""
+        return await self.abuild_from_list(
+            [document.text for document in documents],
+            [document.metadata for document in documents],
+        )
+
+    async def abuild_from_chunks(
+        self,
+        chunks: Iterable[Chunk],
+        corpus: ChunkCorpus,
+        batch_size: int = 4096,
+        metadata: Optional[Dict[Hashable, Dict[str, Any]]] = None,
+    ) -> "VectorDatabase":
+        """
+        Embeds offset-only `Chunk` records and stores the records themselves as keys.
+
+        Chunk text is materialized one batch at a time, only for the embedding
+        request; use `corpus.text(key)` to get the text of a search result.
+
+        :param metadata: Per-document metadata by doc_id, stored for each of its chunks
+        """
+        async def insert_batch(batch):
+            texts = corpus.texts(batch)
+            chunk_metadata = None if metadata is None else [metadata.get(chunk.doc_id) for chunk in batch]
+            self.insert_many(
+                batch, await self.embedding_model.async_get_embeddings(texts), texts, chunk_metadata
+            )
+
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                await insert_batch(batch)
+                batch = []
+        if batch:
+            await insert_batch(batch)
         return self
 
 
@@ -63,7 +666,7 @@ if __name__ == "__main__":
         "Look at this cute hamster munching on a piece of broccoli.",
     ]
 
-    vector_db = VectorDatabase()
+    vector_db = VectorDatabase(storage="matrix")
     vector_db = asyncio.run(vector_db.abuild_from_list(list_of_text))
     k = 2
 
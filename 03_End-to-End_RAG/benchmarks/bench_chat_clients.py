@@ -0,0 +1,107 @@
+"""Latency of per-call OpenAI clients versus the pooled clients ChatOpenAI owns.
+
+Run from the 03_End-to-End_RAG directory:
+
+    python -m benchmarks.bench_chat_clients [--requests 500] [--concurrency 16]
+
+Requests go to a local stub server (benchmarks/stub_openai_server.py). The stub
+speaks plain HTTP, so the measured gap covers client construction and TCP
+connection setup; against the real API each fresh client also pays a TLS
+handshake, which widens it further.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from openai import AsyncOpenAI, OpenAI
+
+from aimakerspace.openai_utils.chatmodel import ChatOpenAI
+from benchmarks.stub_openai_server import start_stub_server
+
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+def summarize(name: str, latencies, wall: float) -> None:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(
+        f"{name:28} {len(latencies) / wall:8.0f} req/s  "
+        f"mean {statistics.mean(latencies) * 1000:6.2f} ms  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms"
+    )
+
+
+def fresh_client_call(base_url: str) -> None:
+    # The previous ChatOpenAI.run behaviour: a new client (and pool) per call
+    client = OpenAI(base_url=base_url)
+    client.chat.completions.create(model="stub", messages=MESSAGES)
+    client.close()
+
+
+def bench_sync(base_url: str, n_requests: int) -> None:
+    def measure(call):
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(n_requests):
+            t = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - t)
+        return latencies, time.perf_counter() - start
+
+    summarize("sync, fresh client per call", *measure(lambda: fresh_client_call(base_url)))
+    with ChatOpenAI(model_name="stub", base_url=base_url) as model:
+        summarize("sync, pooled ChatOpenAI", *measure(lambda: model.run(MESSAGES)))
+
+
+async def bench_async(base_url: str, n_requests: int, concurrency: int) -> None:
+    async def measure(call):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                t = time.perf_counter()
+                await call()
+                latencies.append(time.perf_counter() - t)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(n_requests)])
+        return latencies, time.perf_counter() - start
+
+    async def fresh_stream():
+        client = AsyncOpenAI(base_url=base_url)
+        stream = await client.chat.completions.create(model="stub", messages=MESSAGES, stream=True)
+        async for _ in stream:
+            pass
+        await client.close()
+
+    async with ChatOpenAI(model_name="stub", base_url=base_url) as model:
+        async def pooled_stream():
+            async for _ in model.astream(MESSAGES):
+                pass
+
+        label = f"x{concurrency}"
+        summarize(f"astream {label}, fresh client", *await measure(fresh_stream))
+        summarize(f"astream {label}, pooled", *await measure(pooled_stream))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    server, base_url = start_stub_server()
+    try:
+        bench_sync(base_url, args.requests)
+        asyncio.run(bench_async(base_url, args.requests, args.concurrency))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
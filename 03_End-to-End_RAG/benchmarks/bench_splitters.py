@@ -0,0 +1,85 @@
+"""Compare CharacterTextSplitter and TokenTextSplitter on a KingLear-sized text.
+
+Run from the 03_End-to-End_RAG directory:
+
+    python -m benchmarks.bench_splitters [--path data/KingLear.txt]
+
+Without --path a ~160k-character synthetic play (about the size of King Lear)
+is generated. Reports split time and the token-count spread of the chunks,
+and checks that no TokenTextSplitter chunk exceeds its chunk_size in tokens.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from aimakerspace.text_utils import CharacterTextSplitter, TokenTextSplitter, get_encoding
+
+
+def synthetic_play(n_chars: int = 160_000, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = (
+        "the king and his daughters speak of love and land nothing will come of "
+        "nothing my lord fool storm heath britain france cordelia regan goneril"
+    ).split()
+    speeches = []
+    while sum(len(speech) for speech in speeches) < n_chars:
+        lines = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(4, 14))).capitalize()
+            + rng.choice([".", "!", "?", ",", ";"])
+            for _ in range(rng.randint(1, 12))
+        ]
+        speeches.append(rng.choice(words).upper() + ".\n" + "\n".join(lines))
+    return "\n\n".join(speeches)
+
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", help="Text file to split (defaults to a synthetic play)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--encoding", default="cl100k_base")
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_play()
+    encoding = get_encoding(args.encoding)
+
+    splitters = {
+        "CharacterTextSplitter(1000, 200)": CharacterTextSplitter(1000, 200),
+        "TokenTextSplitter(256, 32)": TokenTextSplitter(256, 32, encoding=encoding),
+        "TokenTextSplitter(20, 5)": TokenTextSplitter(20, 5, encoding=encoding),
+    }
+    print(f"{len(text):,} characters, {len(encoding.encode(text)):,} tokens")
+    for name, splitter in splitters.items():
+        seconds = best_time(lambda: splitter.split(text), args.repeat)
+        chunks = splitter.split(text)
+        tokens = [len(encoding.encode(chunk)) for chunk in chunks]
+        if isinstance(splitter, TokenTextSplitter):
+            assert max(tokens) <= splitter.chunk_size, f"{name}: chunk of {max(tokens)} tokens"
+        mid_word = sum(
+            1
+            for start, end in splitter.split_spans(text)
+            for cut in (start, end)
+            if 0 < cut < len(text) and text[cut - 1].isalnum() and text[cut].isalnum()
+        )
+        print(
+            f"{name:34} {seconds * 1000:8.1f} ms  {len(chunks):5} chunks  "
+            f"tokens mean {statistics.mean(tokens):6.1f} stdev {statistics.pstdev(tokens):5.1f} "
+            f"max {max(tokens):4}  cut mid-word {mid_word}"
+        )
+
+
+if __name__ == "__main__":
+    main()
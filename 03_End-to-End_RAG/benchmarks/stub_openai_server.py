@@ -0,0 +1,95 @@
+"""A minimal local stand-in for the OpenAI chat completions endpoint.
+
+Serves canned (optionally streamed) completions over HTTP/1.1 with keep-alive,
+so client-side overheads can be measured without network noise or API cost.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def _chunk(content: Optional[str]) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [
+            {
+                "index": 0,
+                "delta": {} if content is None else {"content": content},
+                "finish_reason": "stop" if content is None else None,
+            }
+        ],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, Nagle plus delayed
+    # ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        content = request["messages"][-1]["content"]
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if request.get("stream"):
+            body = "".join(
+                f"data: {json.dumps(_chunk(part))}\n\n" for part in (content, None)
+            ) + "data: [DONE]\n\n"
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps(_completion(content))
+            content_type = "application/json"
+
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops bursts of concurrent connects,
+    # which then stall for a 1 s SYN retransmit
+    request_queue_size = 128
+
+
+def start_stub_server(latency: float = 0.0) -> Tuple[_Server, str]:
+    """
+    Starts the stub on a free localhost port in a daemon thread.
+
+    :param latency: Seconds of simulated server processing per request
+    :return: (server, base_url); call `server.shutdown()` when done
+    """
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
@@ -2,9 +2,19 @@
 
 - simple_agent: basic tool-using agent with a single loop.
 - agent_with_helpfulness: agent augmented with a helpfulness evaluator loop.
+
+Importing this package (as the LangGraph server does when loading the graphs)
+starts warming up the RAG graph in the background; set `RAG_WARMUP=0` to
+build it lazily on the first `retrieve_information` call instead.
 """
+import os
+
+if os.environ.get("RAG_WARMUP", "1") != "0":
+    from app.rag import start_rag_warmup
+
+    start_rag_warmup()
+
 __all__ = [
     "simple_agent",
     "agent_with_helpfulness",
 ]
-
@@ -14,14 +14,13 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import AIMessage
 
 from app.state import AgentState
-from app.models import get_chat_model
+from app.models import get_chat_model, get_chat_model_with_tools, get_or_create
 from app.tools import get_tool_belt
 
 
 def _build_model_with_tools():
-    """Return a chat model instance bound to the current tool belt."""
-    model = get_chat_model()
-    return model.bind_tools(get_tool_belt())
+    """Return the process-wide chat model bound to the current tool belt."""
+    return get_chat_model_with_tools(get_tool_belt())
 
 
 def call_model(state: AgentState) -> Dict[str, Any]:
@@ -40,16 +39,9 @@ def route_to_action_or_helpfulness(state: AgentState):
     return "helpfulness"
 
 
-def helpfulness_node(state: AgentState) -> Dict[str, Any]:
-    """Evaluate helpfulness of the latest response relative to the initial query."""
-    # If we've exceeded loop limit, short-circuit with END decision marker
-    if len(state["messages"]) > 10:
-        return {"messages": [AIMessage(content="HELPFULNESS:END")]}    
+HELPFULNESS_MODEL = "gpt-4.1-mini"
 
-    initial_query = state["messages"][0]
-    final_response = state["messages"][-1]
-
-    prompt_template = """
+HELPFULNESS_PROMPT = """
   Given an initial query and a final response, determine if the final response is extremely helpful or not. Please indicate helpfulness with a 'Y' and unhelpfulness as an 'N'.
 
   Initial Query:
@@ -58,10 +50,25 @@ def helpfulness_node(state: AgentState) -> Dict[str, Any]:
   Final Response:
   {final_response}"""
 
-    helpfulness_prompt_template = PromptTemplate.from_template(prompt_template)
-    helpfulness_check_model = get_chat_model(model_name="gpt-4.1-mini")
-    helpfulness_chain = (
-        helpfulness_prompt_template | helpfulness_check_model | StrOutputParser()
+
+def _build_helpfulness_chain():
+    """Return the prompt -> evaluator model -> string chain used by `helpfulness_node`."""
+    helpfulness_prompt_template = PromptTemplate.from_template(HELPFULNESS_PROMPT)
+    helpfulness_check_model = get_chat_model(model_name=HELPFULNESS_MODEL)
+    return helpfulness_prompt_template | helpfulness_check_model | StrOutputParser()
+
+
+def helpfulness_node(state: AgentState) -> Dict[str, Any]:
+    """Evaluate helpfulness of the latest response relative to the initial query."""
+    # If we've exceeded loop limit, short-circuit with END decision marker
+    if len(state["messages"]) > 10:
+        return {"messages": [AIMessage(content="HELPFULNESS:END")]}    
+
+    initial_query = state["messages"][0]
+    final_response = state["messages"][-1]
+
+    helpfulness_chain = get_or_create(
+        ("helpfulness_chain", HELPFULNESS_MODEL), _build_helpfulness_chain
     )
 
     helpfulness_response = helpfulness_chain.invoke(
@@ -13,14 +13,13 @@ from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
 from app.state import AgentState
-from app.models import get_chat_model
+from app.models import get_chat_model_with_tools
 from app.tools import get_tool_belt
 
 
 def _build_model_with_tools():
-    """Return a chat model instance bound to the current tool belt."""
-    model = get_chat_model()
-    return model.bind_tools(get_tool_belt())
+    """Return the process-wide chat model bound to the current tool belt."""
+    return get_chat_model_with_tools(get_tool_belt())
 
 
 def call_model(state: AgentState) -> Dict[str, Any]:
@@ -0,0 +1,33 @@
+"""Readiness routes mounted into the LangGraph server (see `http.app` in langgraph.json).
+
+- `GET /rag/ready`: 200 once the RAG graph is built, 503 while it is still
+  warming up or after a failed build. Point load-balancer health checks here
+  to keep traffic away from replicas whose index is not hot yet. Probes only
+  report: a failed build is retried (with backoff) from the request path.
+- `GET /rag/status`: readiness state plus per-stage build timings.
+"""
+from __future__ import annotations
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.rag import rag_status
+
+
+async def rag_ready(request: Request) -> JSONResponse:
+    status = rag_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+async def rag_status_route(request: Request) -> JSONResponse:
+    return JSONResponse(rag_status())
+
+
+app = Starlette(
+    routes=[
+        Route("/rag/ready", rag_ready),
+        Route("/rag/status", rag_status_route),
+    ]
+)
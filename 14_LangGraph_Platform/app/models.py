@@ -2,14 +2,51 @@
 
 Centralizes configuration of the default chat model and temperature so graphs can
 import a single helper without repeating provider-specific wiring.
+
+Constructed models, tool-bound models and chains are kept in a per-process
+registry keyed by model name and config, so agent steps reuse one client (and
+its HTTP connection pool) and tool schemas are converted only once.
 """
 from __future__ import annotations
 
 import os
-from typing import Any
+import threading
+from typing import Any, Callable, Dict, Hashable, Sequence, TypeVar
 
 from langchain_openai import ChatOpenAI
 
+T = TypeVar("T")
+
+_registry: Dict[Hashable, Any] = {}
+_registry_lock = threading.RLock()
+_registry_pid = os.getpid()
+
+
+def get_or_create(key: Hashable, factory: Callable[[], T]) -> T:
+    """Return the object registered under `key`, calling `factory` to build it on first use.
+
+    The registry is per process: a forked child starts empty rather than
+    sharing its parent's HTTP clients.
+    """
+    global _registry_pid
+    with _registry_lock:
+        if _registry_pid != os.getpid():
+            _registry.clear()
+            _registry_pid = os.getpid()
+        if key not in _registry:
+            _registry[key] = factory()
+        return _registry[key]
+
+
+def clear_registry() -> None:
+    """Drop every registered model and chain (e.g. after changing env config)."""
+    with _registry_lock:
+        _registry.clear()
+
+
+def _resolve_model_name(model_name: str | None) -> str:
+    return model_name or os.environ.get("OPENAI_MODEL", "gpt-4.1-nano")
+
 
 def get_chat_model(model_name: str | None = None, *, temperature: float = 0) -> Any:
     """Return a configured LangChain ChatOpenAI client.
@@ -18,9 +55,26 @@ def get_chat_model(model_name: str | None = None, *, temperature: float = 0) ->
       falling back to "gpt-4.1-nano".
     - temperature: sampling temperature for the chat model.
 
-    Returns: a LangChain-compatible chat model instance.
+    Returns: a LangChain-compatible chat model instance, shared by every caller
+    asking for the same model name and temperature.
     """
-    name = model_name or os.environ.get("OPENAI_MODEL", "gpt-4.1-nano")
-    return ChatOpenAI(model=name, temperature=temperature)
+    name = _resolve_model_name(model_name)
+    return get_or_create(
+        ("chat_model", name, temperature),
+        lambda: ChatOpenAI(model=name, temperature=temperature),
+    )
+
 
+def get_chat_model_with_tools(
+    tools: Sequence[Any], model_name: str | None = None, *, temperature: float = 0
+) -> Any:
+    """Return the chat model from `get_chat_model` bound to `tools`.
 
+    The bound runnable is registered under the model config and the tool
+    names, so the tool definitions are serialized once per process.
+    """
+    name = _resolve_model_name(model_name)
+    return get_or_create(
+        ("chat_model_with_tools", name, temperature, tuple(tool.name for tool in tools)),
+        lambda: get_chat_model(name, temperature=temperature).bind_tools(list(tools)),
+    )
@@ -1,21 +1,38 @@
 """Retrieval-Augmented Generation (RAG) utilities and tool.
 
-This module builds an in-memory RAG pipeline that:
+This module builds a RAG pipeline that:
 - Loads PDF documents from `RAG_DATA_DIR` (default: "data").
 - Splits documents into chunks using a token-aware splitter.
-- Embeds chunks with OpenAI and stores vectors in an in-memory Qdrant store.
+- Embeds chunks with OpenAI and persists them as a versioned on-disk index in
+  `RAG_INDEX_DIR` (default: ".rag_index"), see `app.rag_index`.
 - Exposes a LangChain Tool `retrieve_information` that retrieves relevant
   context and generates a response constrained to that context.
+
+Build the index offline so servers only memory-map it at startup:
+
+    python -m app.rag --data-dir data --index-dir .rag_index
+
+If the index is missing or its manifest no longer matches the sources or the
+chunking/embedding config, it is rebuilt on first use.
+
+Importing `app.graphs` calls `start_rag_warmup()`, which loads the graph in a
+background thread; `_get_rag_graph()` waits on that shared future, and
+`rag_status()` reports readiness and per-stage build timings.
 """
 from __future__ import annotations
 
+import argparse
+import logging
 import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 from functools import lru_cache
-from typing import Annotated, List
+from typing import Annotated, Any, Dict, Iterator, List, Optional, Tuple
 
 import tiktoken
-from langchain_community.document_loaders import DirectoryLoader, PyMuPDFLoader
-from langchain_community.vectorstores import Qdrant
 from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
@@ -25,11 +42,132 @@ from langchain_openai.embeddings import OpenAIEmbeddings
 from langgraph.graph import START, StateGraph
 from typing_extensions import TypedDict
 
+try:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+except Exception:
+    # Fallback to legacy import path if available
+    from langchain.text_splitter import (  # type: ignore
+        RecursiveCharacterTextSplitter,
+    )
+
+from app.pdf_loader import LoadReport, load_pdfs
+from app.rag_index import PersistedIndex, PersistedIndexRetriever, is_stale, list_sources, write_index
+
+logger = logging.getLogger(__name__)
+
+# Anything that changes the stored vectors or chunks; a mismatch with the
+# manifest marks the index stale.
+INDEX_CONFIG: Dict[str, Any] = {
+    "embedding_model": "text-embedding-3-small",
+    "chunk_size": 750,
+    "chunk_overlap": 0,
+}
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str = "gpt-4o") -> tiktoken.Encoding:
+    """Return the (process-wide) tiktoken encoding for `model_name`."""
+    return tiktoken.encoding_for_model(model_name)
+
 
 def _tiktoken_len(text: str) -> int:
     """Return token length using tiktoken; used for chunk length measurement."""
-    tokens = tiktoken.encoding_for_model("gpt-4o").encode(text)
-    return len(tokens)
+    return len(_get_encoding().encode(text))
+
+
+# Levels with fewer unmeasured splits are encoded serially
+_MIN_PARALLEL_SPLITS = 64
+
+
+class _TokenLengthSplitter(RecursiveCharacterTextSplitter):
+    """`RecursiveCharacterTextSplitter` measuring chunks in tiktoken tokens, with fewer encodes.
+
+    The base splitter measures every candidate split when choosing where to
+    recurse, again when merging, and again when dropping it from the front of
+    a chunk. Lengths are memoized so each distinct split is encoded once, and
+    before splitting, the candidate splits of all the texts are measured level
+    by level with `Encoding.encode_batch` on `num_threads` threads (default:
+    CPU count; with one thread they are encoded serially).
+    """
+
+    def __init__(self, num_threads: Optional[int] = None, **kwargs: Any):
+        self._lengths: Dict[str, int] = {}
+        self._num_threads = num_threads or os.cpu_count() or 1
+        self._measured = False
+        super().__init__(length_function=self._token_length, **kwargs)
+
+    def _token_length(self, text: str) -> int:
+        length = self._lengths.get(text)
+        if length is None:
+            length = self._lengths[text] = _tiktoken_len(text)
+        return length
+
+    def _candidate_splits(self, text: str, separators: List[str]) -> Tuple[List[str], List[str]]:
+        """The splits `_split_text` cuts `text` into at this level, and the separators it recurses with."""
+        separator, remaining = separators[-1], []
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if re.search(candidate if self._is_separator_regex else re.escape(candidate), text):
+                separator, remaining = candidate, separators[i + 1 :]
+                break
+        if not separator:
+            return list(text), remaining
+        pattern = separator if self._is_separator_regex else re.escape(separator)
+        if not self._keep_separator:
+            splits = re.split(pattern, text)
+        else:
+            pieces = re.split(f"({pattern})", text)
+            if self._keep_separator == "end":
+                splits = [pieces[i] + pieces[i + 1] for i in range(0, len(pieces) - 1, 2)] + pieces[-1:]
+            else:
+                splits = pieces[:1] + [pieces[i] + pieces[i + 1] for i in range(1, len(pieces), 2)]
+        return [split for split in splits if split], remaining
+
+    def _measure_splits(self, texts: List[str]) -> None:
+        """Memoize the length of every split `_split_text` will measure, one batch per level."""
+        encoding = _get_encoding()
+        level = [(text, self._separators) for text in texts]
+        while level:
+            splits = []
+            for text, separators in level:
+                text_splits, remaining = self._candidate_splits(text, separators)
+                splits.extend((split, remaining) for split in text_splits)
+            unmeasured = list(dict.fromkeys(split for split, _ in splits if split not in self._lengths))
+            if self._num_threads > 1 and len(unmeasured) >= _MIN_PARALLEL_SPLITS:
+                tokens = encoding.encode_batch(unmeasured, num_threads=self._num_threads)
+            else:
+                # encode_batch hands each text to a pool thread; not worth it on one core
+                tokens = [encoding.encode(split) for split in unmeasured]
+            self._lengths.update(zip(unmeasured, map(len, tokens)))
+            # Only splits at least chunk_size long are split again
+            level = [
+                (split, remaining)
+                for split, remaining in splits
+                if remaining and self._lengths[split] >= self._chunk_size
+            ]
+
+    @contextmanager
+    def _memoized(self, texts: List[str]) -> Iterator[None]:
+        if self._measured:
+            yield
+            return
+        self._measure_splits(texts)
+        self._measured = True
+        try:
+            yield
+        finally:
+            self._measured = False
+            self._lengths.clear()
+
+    def split_text(self, text: str) -> List[str]:
+        with self._memoized([text]):
+            return super().split_text(text)
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[Document]:
+        with self._memoized(list(texts)):
+            return super().create_documents(texts, metadatas)
 
 
 class _RAGState(TypedDict):
@@ -39,45 +177,86 @@ class _RAGState(TypedDict):
     response: str
 
 
-def _build_rag_graph(data_dir: str) -> "CompiledGraph":
-    """Construct and compile a minimal RAG graph.
+def _load_documents(data_dir: str, max_workers: Optional[int] = None) -> Tuple[List[Document], LoadReport]:
+    """Load PDFs from `data_dir` recursively across a process pool.
 
-    Steps:
-    1) Load PDFs from `data_dir` recursively (best-effort).
-    2) Split documents into token-aware chunks.
-    3) Create embeddings and an in-memory Qdrant vector store retriever.
-    4) Define a chat prompt and generation model.
-    5) Wire a two-node graph: retrieve -> generate.
+    `max_workers` defaults to RAG_LOAD_WORKERS, else the CPU count. Files that
+    fail to load are logged and listed in the report's `errors`; the rest of
+    the corpus is still returned.
     """
-    # Load PDFs from data directory (recursive)
-    try:
-        directory_loader = DirectoryLoader(
-            data_dir, glob="**/*.pdf", loader_cls=PyMuPDFLoader
-        )
-        documents = directory_loader.load()
-    except Exception:
-        documents = []
+    if max_workers is None:
+        max_workers = int(os.environ.get("RAG_LOAD_WORKERS", 0)) or None
+    documents, report = load_pdfs(list_sources(data_dir), max_workers)
+    for path, error in report.errors.items():
+        logger.warning("Failed to load %s: %s", path, error)
+    logger.info("%s", report)
+    return documents, report
 
-    # Split documents
-    try:
-        from langchain_text_splitters import RecursiveCharacterTextSplitter
-    except Exception:
-        # Fallback to legacy import path if available
-        from langchain.text_splitter import (  # type: ignore
-            RecursiveCharacterTextSplitter,
-        )
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=750, chunk_overlap=0, length_function=_tiktoken_len
+def _split_documents(documents: List[Document]) -> List[Document]:
+    """Split documents into token-aware chunks.
+
+    Candidate splits are tokenized on RAG_TOKENIZER_THREADS threads (default:
+    CPU count).
+    """
+    text_splitter = _TokenLengthSplitter(
+        num_threads=int(os.environ.get("RAG_TOKENIZER_THREADS", 0)) or None,
+        chunk_size=INDEX_CONFIG["chunk_size"],
+        chunk_overlap=INDEX_CONFIG["chunk_overlap"],
     )
-    chunks = text_splitter.split_documents(documents) if documents else []
+    return text_splitter.split_documents(documents) if documents else []
+
 
-    # Embeddings and vector store (in-memory Qdrant)
-    embedding_model = OpenAIEmbeddings(model="text-embedding-3-small")
-    qdrant_vectorstore = Qdrant.from_documents(
-        documents=chunks, embedding=embedding_model, location=":memory:"
+def _get_embedding_model() -> OpenAIEmbeddings:
+    return OpenAIEmbeddings(model=INDEX_CONFIG["embedding_model"])
+
+
+def build_rag_index(data_dir: str, index_dir: str, max_workers: Optional[int] = None) -> str:
+    """Load, split and embed the PDFs in `data_dir` into a new build under `index_dir`.
+
+    The load report (throughput and per-file errors) is kept in the manifest
+    under "ingest". Returns the new build directory.
+    """
+    documents, report = _load_documents(data_dir, max_workers)
+    chunks = _split_documents(documents)
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = _get_embedding_model().embed_documents(texts) if texts else []
+    os.makedirs(index_dir, exist_ok=True)
+    return write_index(index_dir, data_dir, chunks, vectors, INDEX_CONFIG, extra={"ingest": report.as_dict()})
+
+
+def load_rag_index(data_dir: str, index_dir: str) -> PersistedIndex:
+    """Memory-map the current index in `index_dir`, rebuilding it first if stale."""
+    if is_stale(index_dir, data_dir, INDEX_CONFIG):
+        build_rag_index(data_dir, index_dir)
+    return PersistedIndex.load(index_dir)
+
+
+def _build_rag_graph(
+    data_dir: str,
+    index_dir: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> "CompiledGraph":
+    """Construct and compile a minimal RAG graph.
+
+    Steps:
+    1) Load the persisted index from `index_dir` (building it from the PDFs
+       in `data_dir` if it is missing or stale).
+    2) Wrap it in a retriever that embeds queries with the index's model.
+    3) Define a chat prompt and generation model.
+    4) Wire a two-node graph: retrieve -> generate.
+
+    If `timings` is given, seconds spent loading the index and compiling the
+    graph are recorded under "index" and "compile".
+    """
+    timings = {} if timings is None else timings
+    index_dir = index_dir or ".rag_index"
+    start = time.perf_counter()
+    retriever = PersistedIndexRetriever(
+        index=load_rag_index(data_dir, index_dir), embeddings=_get_embedding_model()
     )
-    retriever = qdrant_vectorstore.as_retriever()
+    timings["index"] = time.perf_counter() - start
+    start = time.perf_counter()
 
     # Prompt and model
     human_template = (
@@ -102,14 +281,100 @@ def _build_rag_graph(data_dir: str) -> "CompiledGraph":
     graph_builder = StateGraph(_RAGState)
     graph_builder = graph_builder.add_sequence([retrieve, generate])
     graph_builder.add_edge(START, "retrieve")
-    return graph_builder.compile()
+    graph = graph_builder.compile()
+    timings["compile"] = time.perf_counter() - start
+    return graph
+
+
+# Seconds to wait before retrying a failed build, doubling per consecutive failure
+RAG_RETRY_BACKOFF = 30.0
+RAG_RETRY_BACKOFF_MAX = 900.0
+
+_rag_graph_lock = threading.Lock()
+_rag_graph_future: Optional[Future] = None
+_rag_build_timings: Dict[str, float] = {}
+_rag_build_failures = 0
+_rag_retry_at = 0.0
 
 
-@lru_cache(maxsize=1)
-def _get_rag_graph():
-    """Return a cached compiled RAG graph built from RAG_DATA_DIR."""
+def _warm_rag_graph(future: Future) -> None:
+    """Build the graph from RAG_DATA_DIR/RAG_INDEX_DIR and resolve `future` with it."""
     data_dir = os.environ.get("RAG_DATA_DIR", "data")
-    return _build_rag_graph(data_dir)
+    index_dir = os.environ.get("RAG_INDEX_DIR", ".rag_index")
+    global _rag_build_failures, _rag_retry_at
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    try:
+        graph = _build_rag_graph(data_dir, index_dir, timings)
+    except BaseException as exc:
+        timings["total"] = time.perf_counter() - start
+        _rag_build_timings.update(timings)
+        with _rag_graph_lock:
+            _rag_build_failures += 1
+            backoff = RAG_RETRY_BACKOFF * 2 ** (_rag_build_failures - 1)
+            _rag_retry_at = time.monotonic() + min(backoff, RAG_RETRY_BACKOFF_MAX)
+        future.set_exception(exc)
+    else:
+        timings["total"] = time.perf_counter() - start
+        _rag_build_timings.update(timings)
+        with _rag_graph_lock:
+            _rag_build_failures = 0
+        future.set_result(graph)
+
+
+def start_rag_warmup() -> Future:
+    """Start building the RAG graph in a background thread, once per process.
+
+    Every caller gets the same future, so concurrent first requests wait for
+    one build instead of racing. After a failed build, calls keep getting the
+    failed future until the retry backoff (RAG_RETRY_BACKOFF, doubling per
+    consecutive failure up to RAG_RETRY_BACKOFF_MAX) has elapsed; the first
+    call after that starts a new build.
+    """
+    global _rag_graph_future
+    with _rag_graph_lock:
+        future = _rag_graph_future
+        failed = future is not None and future.done() and future.exception() is not None
+        if future is None or (failed and time.monotonic() >= _rag_retry_at):
+            future = _rag_graph_future = Future()
+            future.set_running_or_notify_cancel()
+            _rag_build_timings.clear()
+            threading.Thread(
+                target=_warm_rag_graph, args=(future,), name="rag-warmup", daemon=True
+            ).start()
+        return future
+
+
+def rag_status() -> Dict[str, Any]:
+    """Readiness of the RAG graph: state ("idle", "building", "ready" or "failed"),
+    `ready`, build `timings` in seconds, the build `error`, if any, and
+    `retry_in`, the seconds until a failed build may be retried.
+
+    Only reports; it never starts or retries a build.
+    """
+    future = _rag_graph_future
+    if future is None:
+        state, error = "idle", None
+    elif not future.done():
+        state, error = "building", None
+    else:
+        error = future.exception()
+        state = "failed" if error is not None else "ready"
+    return {
+        "state": state,
+        "ready": state == "ready",
+        "timings": dict(_rag_build_timings),
+        "error": repr(error) if error is not None else None,
+        "retry_in": max(0.0, _rag_retry_at - time.monotonic()) if state == "failed" else None,
+    }
+
+
+def _get_rag_graph(timeout: Optional[float] = None):
+    """Return the compiled RAG graph, waiting for the shared warm-up build.
+
+    Raises the build error while a failed build is backing off.
+    """
+    return start_rag_warmup().result(timeout)
 
 
 @tool
@@ -125,3 +390,22 @@ def retrieve_information(
     return result
 
 
+def main() -> None:
+    """Build the RAG index offline: `python -m app.rag [--force]`."""
+    parser = argparse.ArgumentParser(description="Build the on-disk RAG index.")
+    parser.add_argument("--data-dir", default=os.environ.get("RAG_DATA_DIR", "data"))
+    parser.add_argument("--index-dir", default=os.environ.get("RAG_INDEX_DIR", ".rag_index"))
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the index is up to date.")
+    parser.add_argument("--workers", type=int, default=None, help="PDF loading processes (default: CPU count).")
+    args = parser.parse_args()
+
+    if not args.force and not is_stale(args.index_dir, args.data_dir, INDEX_CONFIG):
+        print(f"Index in {args.index_dir} is up to date.")
+        return
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    build_dir = build_rag_index(args.data_dir, args.index_dir, args.workers)
+    print(f"Wrote {len(PersistedIndex(build_dir))} chunks to {build_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Persistent, memory-mapped vector index for the RAG tool.
+
+An index directory holds one or more immutable builds plus a `CURRENT` file
+naming the active one, so a rebuild never disturbs processes reading the
+previous build. Each build contains:
+- `manifest.json`: format version, embedding/chunking config, chunk count and
+  the size, mtime and SHA-256 of every source file.
+- `vectors.npy`: float32 unit-length embeddings, one row per chunk.
+- `chunks.bin` + `offsets.npy`: the UTF-8 chunk texts back to back and the
+  byte offset where each starts.
+- `metadata.jsonl`: one JSON metadata object per chunk.
+
+`vectors.npy` and `chunks.bin` are memory-mapped on load, so server workers
+share one page-cached copy and start without re-embedding anything.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import time
+import uuid
+from glob import glob
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+INDEX_FORMAT_VERSION = 1
+SOURCE_GLOB = "**/*.pdf"
+
+
+def _sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_sources(data_dir: str) -> List[str]:
+    """Return the paths of every PDF under `data_dir`, sorted."""
+    return sorted(glob(os.path.join(data_dir, SOURCE_GLOB), recursive=True))
+
+
+def scan_sources(data_dir: str) -> Dict[str, Dict[str, int]]:
+    """Return {relative path: {"size", "mtime_ns"}} for every PDF under `data_dir`."""
+    sources = {}
+    for path in list_sources(data_dir):
+        stat = os.stat(path)
+        sources[os.path.relpath(path, data_dir)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return sources
+
+
+def current_build_dir(index_dir: str) -> Optional[str]:
+    """Return the active build directory of `index_dir`, or None if there is none."""
+    try:
+        with open(os.path.join(index_dir, "CURRENT"), encoding="utf-8") as f:
+            build_dir = os.path.join(index_dir, f.read().strip())
+    except FileNotFoundError:
+        return None
+    return build_dir if os.path.isfile(os.path.join(build_dir, "manifest.json")) else None
+
+
+def read_manifest(index_dir: str) -> Optional[Dict[str, Any]]:
+    build_dir = current_build_dir(index_dir)
+    if build_dir is None:
+        return None
+    with open(os.path.join(build_dir, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_stale(index_dir: str, data_dir: str, config: Dict[str, Any]) -> bool:
+    """Whether the active build is missing or out of date for `data_dir` and `config`.
+
+    Sources are compared by size and mtime first; a file whose mtime changed
+    but whose content hash still matches (e.g. after a fresh checkout) does
+    not count as a change.
+    """
+    manifest = read_manifest(index_dir)
+    if manifest is None or manifest.get("format_version") != INDEX_FORMAT_VERSION:
+        return True
+    if manifest.get("config") != config:
+        return True
+    recorded = manifest["sources"]
+    current = scan_sources(data_dir)
+    if set(recorded) != set(current):
+        return True
+    for name, stat in current.items():
+        entry = recorded[name]
+        if entry["size"] != stat["size"]:
+            return True
+        if entry["mtime_ns"] != stat["mtime_ns"] and entry["sha256"] != _sha256(os.path.join(data_dir, name)):
+            return True
+    return False
+
+
+def write_index(
+    index_dir: str,
+    data_dir: str,
+    chunks: List[Document],
+    vectors: np.ndarray,
+    config: Dict[str, Any],
+    keep_builds: int = 2,
+    extra: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Write a new build for `chunks`/`vectors`, make it current and prune old builds.
+
+    - keep_builds: number of most recent builds to keep (the new one included),
+      so readers still holding the previous build keep working.
+    - extra: additional JSON-serializable entries for the manifest.
+
+    Returns: the new build directory.
+    """
+    sources = {
+        name: {**stat, "sha256": _sha256(os.path.join(data_dir, name))}
+        for name, stat in scan_sources(data_dir).items()
+    }
+    if chunks:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(chunks), -1)
+    else:
+        # Nothing loaded (empty data dir, or every PDF failed): an empty build
+        # still loads, and retrieval returns no context
+        vectors = np.empty((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+
+    build_id = f"build-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    build_dir = os.path.join(index_dir, build_id)
+    os.makedirs(build_dir)
+    np.save(os.path.join(build_dir, "vectors.npy"), vectors)
+    encoded = [chunk.page_content.encode("utf-8") for chunk in chunks]
+    np.save(os.path.join(build_dir, "offsets.npy"), np.cumsum([0] + [len(text) for text in encoded]))
+    with open(os.path.join(build_dir, "chunks.bin"), "wb") as f:
+        for text in encoded:
+            f.write(text)
+    with open(os.path.join(build_dir, "metadata.jsonl"), "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk.metadata, ensure_ascii=False, default=str) + "\n")
+    # The manifest goes last: a build without one is never considered valid
+    with open(os.path.join(build_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "format_version": INDEX_FORMAT_VERSION,
+                "config": config,
+                "count": len(chunks),
+                "dim": int(vectors.shape[1]) if chunks else None,
+                "built_at": time.time(),
+                "sources": sources,
+                **(extra or {}),
+            },
+            f,
+            indent=2,
+        )
+
+    tmp_path = os.path.join(index_dir, f"CURRENT.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(build_id)
+    os.replace(tmp_path, os.path.join(index_dir, "CURRENT"))
+
+    builds = sorted(
+        (os.path.join(index_dir, name) for name in os.listdir(index_dir) if name.startswith("build-")),
+        key=os.path.getmtime,
+    )
+    for path in builds[:-keep_builds]:
+        if path != build_dir:
+            shutil.rmtree(path, ignore_errors=True)
+    return build_dir
+
+
+class PersistedIndex:
+    """Read-only view of an index build with memory-mapped vectors and texts."""
+
+    def __init__(self, build_dir: str):
+        self.build_dir = build_dir
+        with open(os.path.join(build_dir, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.vectors = np.load(os.path.join(build_dir, "vectors.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(build_dir, "offsets.npy"))
+        with open(os.path.join(build_dir, "metadata.jsonl"), encoding="utf-8") as f:
+            self.metadata = [json.loads(line) for line in f]
+        self._texts = None
+        if self.offsets[-1] > 0:
+            with open(os.path.join(build_dir, "chunks.bin"), "rb") as f:
+                self._texts = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def load(cls, index_dir: str) -> "PersistedIndex":
+        build_dir = current_build_dir(index_dir)
+        if build_dir is None:
+            raise FileNotFoundError(f"No RAG index build in {index_dir}")
+        return cls(build_dir)
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    def document(self, i: int) -> Document:
+        text = b"" if self._texts is None else self._texts[self.offsets[i] : self.offsets[i + 1]]
+        return Document(page_content=text.decode("utf-8"), metadata=dict(self.metadata[i]))
+
+    def search(self, query_vector: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        """Exact cosine top-k as one matrix-vector product over the mapped rows."""
+        if len(self) == 0 or k <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.document(int(i)), float(scores[i])) for i in top]
+
+
+class PersistedIndexRetriever(BaseRetriever):
+    """LangChain retriever over a `PersistedIndex`; embeds the query, returns the top `k` chunks."""
+
+    index: Any
+    embeddings: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        query_vector = self.embeddings.embed_query(query)
+        return [document for document, _ in self.index.search(query_vector, self.k)]
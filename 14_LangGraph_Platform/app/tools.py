@@ -9,12 +9,21 @@ from typing import List
 
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_community.tools.arxiv.tool import ArxivQueryRun
+from app.models import get_or_create
 from app.rag import retrieve_information
 
 
-def get_tool_belt() -> List:
-    """Return the list of tools available to agents (Tavily, Arxiv, RAG)."""
+def _build_tool_belt() -> List:
     tavily_tool = TavilySearchResults(max_results=5)
     return [tavily_tool, ArxivQueryRun(), retrieve_information]
 
 
+def get_tool_belt() -> List:
+    """Return the list of tools available to agents (Tavily, Arxiv, RAG).
+
+    The tool instances are created once per process; each call returns a new
+    list over them.
+    """
+    return list(get_or_create(("tool_belt",), _build_tool_belt))
+
+
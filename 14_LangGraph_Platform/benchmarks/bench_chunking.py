@@ -0,0 +1,63 @@
+"""Chunking time of the RAG ingest before and after the tokenizer changes in app.rag.
+
+Run from the 14_LangGraph_Platform directory:
+
+    python -m benchmarks.bench_chunking [--data-dir data] [--repeat 3]
+
+The PDFs are loaded once; the timed part is the token-aware split that
+`_build_rag_graph` runs when it (re)builds the index. "before" is the original
+splitter, whose length function looks up the tiktoken encoding on every call;
+"after" is `app.rag._split_documents`. Both must produce identical chunks.
+"""
+import argparse
+import time
+
+import tiktoken
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.rag import INDEX_CONFIG, _load_documents, _split_documents
+
+
+def uncached_tiktoken_len(text: str) -> int:
+    # The previous app.rag._tiktoken_len
+    return len(tiktoken.encoding_for_model("gpt-4o").encode(text))
+
+
+def split_before(documents):
+    return RecursiveCharacterTextSplitter(
+        chunk_size=INDEX_CONFIG["chunk_size"],
+        chunk_overlap=INDEX_CONFIG["chunk_overlap"],
+        length_function=uncached_tiktoken_len,
+    ).split_documents(documents)
+
+
+def best_of(repeat: int, split, documents):
+    best, chunks = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = split(documents)
+        best = min(best, time.perf_counter() - start)
+    return best, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    documents, report = _load_documents(args.data_dir)
+    print(report)
+    n_chars = sum(len(document.page_content) for document in documents)
+    print(f"{len(documents)} pages, {n_chars:,} characters from {args.data_dir}")
+    tiktoken.encoding_for_model("gpt-4o")  # load the BPE file outside the timings
+
+    before, expected = best_of(args.repeat, split_before, documents)
+    print(f"{'before':32} {before:7.3f} s  {len(expected)} chunks")
+    after, chunks = best_of(args.repeat, _split_documents, documents)
+    assert [c.page_content for c in chunks] == [c.page_content for c in expected]
+    print(f"{'after':32} {after:7.3f} s  {before / after:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()